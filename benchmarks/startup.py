@@ -0,0 +1,63 @@
+"""Startup-time benchmark for the rose package.
+
+Each case runs in a fresh interpreter so module caches don't hide import cost:
+
+    python benchmarks/startup.py [--repeat N]
+
+The geometry cases must not import any rendering backend; the script exits
+non-zero if one does.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+BACKENDS = ('plotly', 'matplotlib', 'pyvista', 'colour')
+
+CASES = {
+    'python': "pass",
+    'import numpy': "import numpy",
+    'import rose': "import rose",
+    'rose geometry': "import rose; rose.generate_3d_horn_torus(100)",
+    'rose render backend': "import rose; rose.build_horn_torus_figure",
+}
+
+# Cases that only need NumPy, with the backends they must leave unimported
+LIGHT_CASES = ('import rose', 'rose geometry')
+
+_REPORT = "import sys; print(','.join(m for m in %r if m in sys.modules))"
+
+def run_case(code):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC))
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code + '\n' + _REPORT % (BACKENDS,)],
+                         env=env, check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, [m for m in out.strip().split(',') if m]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    baseline = None
+    for name, code in CASES.items():
+        times = []
+        for _ in range(args.repeat):
+            elapsed, backends = run_case(code)
+            times.append(elapsed)
+        best = min(times)
+        baseline = best if baseline is None else baseline
+        print(f"{name:22s} best {best * 1000:8.1f} ms  median {statistics.median(times) * 1000:8.1f} ms"
+              f"  (+{(best - baseline) * 1000:7.1f} ms over bare python)  backends: {', '.join(backends) or '-'}")
+        if name in LIGHT_CASES and backends:
+            print(f"  FAIL: {name!r} imported {', '.join(backends)}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
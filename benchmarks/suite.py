@@ -0,0 +1,361 @@
+"""Benchmark suite for generation, coloring, rendering and export.
+
+Every case is timed (best and median of --repeat runs), then run once more under
+tracemalloc for its peak memory. Results are appended to a JSON history, and each
+result is compared with the previous run of the same case and parameters:
+
+    python benchmarks/suite.py                    # full grid
+    python benchmarks/suite.py --quick -k generate
+    python benchmarks/suite.py --fail-on-regression 0.1
+
+Cases are registered with @case(name, param=[values, ...]); the decorated function
+does its setup and returns the callable to time. Cases whose optional dependency is
+missing (plotly, pyvista) are skipped.
+"""
+import argparse
+import colorsys
+import datetime
+import importlib.util
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, 'src'))
+
+import numpy as np  # noqa: E402
+
+from rose import (beauty, coverage, dwell, factored, gltf, kernels, paths, phase, simplify, song,  # noqa: E402
+                  texture, volume, wire)
+from rose.color import COLOR_MODELS  # noqa: E402
+from rose.geometry import generate_3d_horn_torus  # noqa: E402
+from rose.log import configure_logging  # noqa: E402
+from rose.sampling import adaptive_horn_torus  # noqa: E402
+from rose.wheel import generate_color_square  # noqa: E402
+
+DEFAULT_HISTORY = os.path.join(HERE, 'history.json')
+
+CASES = []
+
+# Register a benchmark over the product of its parameter lists; `quick` restricts them
+def case(name, requires=(), quick=None, **params):
+    def register(fn):
+        CASES.append({'name': name, 'fn': fn, 'params': params, 'quick': quick or {}, 'requires': requires})
+        return fn
+    return register
+
+def nested_layers(resolution, layers):
+    return [generate_3d_horn_torus(resolution, radius=(i + 1) / layers, saturation=(i + 1) / layers)
+            for i in range(layers)]
+
+# Copy of the per-pixel colorsys loop every archived generator used (src/_ARCHIVE/3 plotly/rosePL4.py)
+def archived_generate_3d_horn_torus(resolution=100, radius=1, saturation=1.0):
+    u = np.linspace(0, 2 * np.pi, resolution)
+    v = np.linspace(0, 2 * np.pi, resolution)
+    U, V = np.meshgrid(u, v)
+    X = (radius + radius * np.cos(V + np.pi)) * np.cos(U)
+    Y = (radius + radius * np.cos(V + np.pi)) * np.sin(U)
+    Z = radius * np.sin(V + np.pi)
+    Opacity = 1 - V / (2 * np.pi)
+    hue = U / (2 * np.pi)
+    lightness = 0.5
+    rgb = np.zeros((resolution, resolution, 4))
+    for i in range(resolution):
+        for j in range(resolution):
+            r, g, b = colorsys.hls_to_rgb(hue[i, j], lightness, saturation)
+            rgb[i, j] = [r, g, b, Opacity[i, j]]
+    return X, Y, Z, rgb
+
+archive_logger = logging.getLogger('rose.bench.archive')
+
+# Copy of the archived color wheel (src/_ARCHIVE/1 matplotlib/rose.py) with its per-pixel logging
+def archived_generate_color_square(resolution=500):
+    theta = np.linspace(0, 2 * np.pi, resolution)
+    Theta, R = np.meshgrid(theta, np.linspace(0, 1, resolution))
+    square = np.ones((resolution, resolution, 4))
+    for i in range(resolution):
+        for j in range(resolution):
+            r, g, b = colorsys.hls_to_rgb(Theta[i, j] / (2 * np.pi), 0.5, R[i, j])
+            square[i, j] = [r, g, b, 1.0]
+    circle = np.ones((resolution, resolution, 4)) * [1, 1, 1, 0]
+    center = resolution // 2
+    scale = resolution / 2
+    for i in range(resolution):
+        for j in range(resolution):
+            x = int(center + R[i, j] * np.cos(Theta[i, j]) * scale)
+            y = int(center + R[i, j] * np.sin(Theta[i, j]) * scale)
+            if 0 <= x < resolution and 0 <= y < resolution:
+                circle[y, x] = square[i, j]
+                archive_logger.debug(f"Mapped point ({i}, {j}) to Cartesian ({x}, {y}) with color {square[i, j]}.")
+    return circle
+
+# Run fn with the rose loggers at `level`, writing to a real (discarded) stream so formatting is paid for
+def at_log_level(fn, level):
+    def run():
+        with open(os.devnull, 'w') as devnull:
+            logger = configure_logging(level, stream=devnull)
+            handler = logger.handlers[-1]
+            try:
+                return fn()
+            finally:
+                # Drop the handler with its stream, so nothing logs to it once closed
+                logger.removeHandler(handler)
+                logger.setLevel(logging.WARNING)
+    return run
+
+@case('generate', resolution=[50, 100, 200, 500, 1000, 2000], quick={'resolution': [50, 200]})
+def bench_generate(resolution):
+    return lambda: generate_3d_horn_torus(resolution)
+
+@case('generate_fused', resolution=[100, 1000, 2000], backend=list(kernels.BACKENDS), preallocated=[False, True],
+      quick={'resolution': [1000]})
+def bench_generate_fused(resolution, backend, preallocated):
+    out = kernels.horn_torus_buffers(resolution) if preallocated else None
+    kernels.fused_horn_torus(resolution, out=out, backend=backend)  # compile once outside the timing
+    return lambda: kernels.fused_horn_torus(resolution, out=out, backend=backend)
+
+@case('generate_layers', resolution=[100, 500], layers=[1, 5, 20, 50],
+      quick={'resolution': [100], 'layers': [1, 20]})
+def bench_generate_layers(resolution, layers):
+    return lambda: nested_layers(resolution, layers)
+
+@case('generate_factored', resolution=[100, 1000, 2000], build=['none', 'rgba', 'all'],
+      quick={'resolution': [1000]})
+def bench_generate_factored(resolution, build):
+    def generate():
+        layer = factored.factored_horn_torus(resolution)
+        if build == 'rgba':
+            return layer.rgba
+        return tuple(layer) if build == 'all' else layer
+    return generate
+
+@case('generate_workspace', resolution=[100, 500], layers=[20], quick={'resolution': [100]})
+def bench_generate_workspace(resolution, layers):
+    workspace = kernels.Workspace(resolution, layers)
+    return workspace.nested
+
+@case('generate_log_level', resolution=[100, 1000], level=['WARNING', 'INFO', 'DEBUG'],
+      quick={'resolution': [100]})
+def bench_generate_log_level(resolution, level):
+    return at_log_level(lambda: nested_layers(resolution, 20), level)
+
+@case('adaptive_sampling', budget=[10000, 250000], mode=['uniform', 'curvature'], mesh=[False, True],
+      quick={'budget': [10000]})
+def bench_adaptive_sampling(budget, mode, mesh):
+    return lambda: adaptive_horn_torus(budget, mode=mode, mesh=mesh)
+
+@case('color_wheel', resolution=[100, 500], level=['WARNING', 'DEBUG'], quick={'resolution': [100]})
+def bench_color_wheel(resolution, level):
+    return at_log_level(lambda: generate_color_square(resolution), level)
+
+@case('baseline_wheel', resolution=[100, 200], level=['WARNING', 'DEBUG'], quick={'resolution': [100]})
+def bench_baseline_wheel(resolution, level):
+    return at_log_level(lambda: archived_generate_color_square(resolution), level)
+
+@case('baseline_colorsys', resolution=[50, 100, 200, 500], quick={'resolution': [50, 100]})
+def bench_baseline_colorsys(resolution):
+    return lambda: archived_generate_3d_horn_torus(resolution)
+
+@case('figure_build', requires=('plotly',), resolution=[50, 100, 200], layers=[1, 5, 20],
+      quick={'resolution': [50], 'layers': [5]})
+def bench_figure_build(resolution, layers):
+    from rose import render
+    return lambda: render.build_horn_torus_figure(resolution, layers)
+
+@case('figure_json', requires=('plotly',), resolution=[50, 100], layers=[5, 20],
+      quick={'resolution': [50], 'layers': [5]})
+def bench_figure_json(resolution, layers):
+    from rose import render
+    figure = render.build_horn_torus_figure(resolution, layers)
+    return figure.to_json
+
+@case('export_wire', resolution=[100, 500, 2000], layers=[20], quick={'resolution': [100]})
+def bench_export_wire(resolution, layers):
+    colors = [rgba for *_, rgba in nested_layers(resolution, layers)]
+    return lambda: wire.encode_scene(resolution, layers, colors)
+
+@case('export_npz', resolution=[100, 500], layers=[20], quick={'resolution': [100]})
+def bench_export_npz(resolution, layers):
+    X, Y, Z, rgba = (np.stack(a) for a in zip(*nested_layers(resolution, layers)))
+    return lambda: np.savez_compressed(io.BytesIO(), x=X, y=Y, z=Z, rgba=rgba)
+
+@case('export_glb', resolution=[100, 500], layers=[20], quick={'resolution': [100]})
+def bench_export_glb(resolution, layers):
+    nested = [{'radius': (i + 1) / layers, 'saturation': (i + 1) / layers} for i in range(layers)]
+    return lambda: gltf.encode_glb(resolution, nested)
+
+@case('volume', size=[100, 300], layers=[20, 200], quick={'size': [100], 'layers': [20]})
+def bench_volume(size, layers):
+    return lambda: volume.render_volume(size, size, layers=layers)
+
+@case('song', seconds=[10, 60], quick={'seconds': [10]})
+def bench_song(seconds):
+    def play():
+        with open(os.devnull, 'wb') as sink:
+            song.write_raw(sink, seconds=seconds)
+    return play
+
+@case('beauty', paths=[1000, 10000], quick={'paths': [1000]})
+def bench_beauty(paths):
+    candidates = beauty.random_journeys(paths)
+    return lambda: beauty.rank_journeys(candidates)
+
+@case('journey_spacing', spacing=['time', 'arc', 'curvature'], length=[3, 50], quick={'length': [3]})
+def bench_journey_spacing(spacing, length):
+    return lambda: paths.journey_angles(0.3, 40.0, length, spacing=spacing)
+
+@case('path_chunks', length=[100, 10000], chunk=[1 << 12, 1 << 16], quick={'length': [100]})
+def bench_path_chunks(length, chunk):
+    def run():
+        for _ in phase.journey_chunks(0.3, 40.0, length, chunk=chunk):
+            pass
+    return run
+
+@case('ranked_path', length=[8, 50, 200], quick={'length': [8]})
+def bench_ranked_path(length):
+    points = paths.journey_points(1.0, 0.0, 2 * np.pi, length)
+    return lambda: simplify.encode_ranked(points)
+
+@case('coverage', length=[8, 200], bins=[64, 256], quick={'length': [8], 'bins': [256]})
+def bench_coverage(length, bins):
+    _, u, v = paths.journey_angles(0.3, 40.0, length)
+    return lambda: coverage.path_statistics(u, v, bins)
+
+@case('dwell', paths=[1000, 10000], cached=[False, True], quick={'paths': [1000]})
+def bench_dwell(paths, cached):
+    candidates = beauty.random_journeys(paths)
+    dwell.dwell_table(candidates)
+    def run():
+        if not cached:
+            dwell.clear_cache()
+        dwell.dwell_table(candidates)
+    return run
+
+@case('path_colors', samples=[10 ** 5, 10 ** 6], model=['hls', 'alchemical'],
+      method=['exact', 'nearest', 'bilinear'], quick={'samples': [10 ** 5], 'model': ['hls']})
+def bench_path_colors(samples, model, method):
+    _, u, v = paths.journey_angles(0.3, 5.0, samples / 200)
+    if method == 'exact':
+        return lambda: COLOR_MODELS[model](u, np.mod(v, 2 * np.pi), 1.0)
+    texture.color_texture(model)
+    return lambda: texture.path_colors(u, v, model, filter=method)
+
+# The archived ParaView exporter (src/_ARCHIVE/2 paraview/rosePV.py), minus the file write
+@case('baseline_vtp', requires=('pyvista',), resolution=[100, 500], quick={'resolution': [100]})
+def bench_baseline_vtp(resolution):
+    import pyvista as pv
+
+    def export():
+        X, Y, Z, colors = archived_generate_3d_horn_torus(resolution)
+        mesh = pv.PolyData(np.c_[X.ravel(), Y.ravel(), Z.ravel()])
+        mesh['Colors'] = (colors[:, :, :3] * 255).astype(np.uint8).reshape(-1, 3)
+        return mesh
+    return export
+
+def expand(entry, quick):
+    params = dict(entry['params'], **(entry['quick'] if quick else {}))
+    names = list(params)
+    for values in itertools.product(*(params[n] for n in names)):
+        yield dict(zip(names, values))
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        if times[-1] > 5:  # very slow baselines are timed once
+            break
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), statistics.median(times), peak
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def previous_result(history, name, params):
+    for run in reversed(history):
+        for result in run['results']:
+            if result['case'] == name and result['params'] == params:
+                return result
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', '--filter', default='', help="regex on case names")
+    parser.add_argument('--quick', action='store_true', help="small parameter grid for a fast check")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history to append to")
+    parser.add_argument('--no-save', action='store_true', help="don't append this run to the history")
+    parser.add_argument('--fail-on-regression', type=float, metavar='FRACTION',
+                        help="exit non-zero if any case is this much slower than its previous run")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    results = []
+    regressions = []
+    for entry in CASES:
+        if not re.search(args.filter, entry['name']):
+            continue
+        missing = [m for m in entry['requires'] if importlib.util.find_spec(m) is None]
+        if missing:
+            print(f"{entry['name']:18s} skipped, needs {', '.join(missing)}")
+            continue
+        for params in expand(entry, args.quick):
+            best, median, peak = measure(entry['fn'](**params), args.repeat)
+            result = {'case': entry['name'], 'params': params, 'best': best, 'median': median, 'peak_bytes': peak}
+            results.append(result)
+
+            change = ''
+            previous = previous_result(history, entry['name'], params)
+            if previous is not None:
+                ratio = best / previous['best'] - 1
+                change = f"{ratio:+7.1%} vs previous"
+                if args.fail_on_regression is not None and ratio > args.fail_on_regression:
+                    regressions.append(result)
+            label = ' '.join(f"{k}={v}" for k, v in params.items())
+            print(f"{entry['name']:18s} {label:28s} {best * 1000:10.2f} ms  "
+                  f"peak {peak / 2 ** 20:9.2f} MiB  {change}")
+
+    if not args.no_save and results:
+        history.append({
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'quick': args.quick,
+            'results': results,
+        })
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=1)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.fail_on_regression:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
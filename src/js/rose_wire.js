@@ -0,0 +1,142 @@
+// Reference decoder for the horn torus wire format written by src/rose/wire.py.
+// Geometry is rebuilt from (resolution, radius), or once per resolution for an instanced scene;
+// colors come from the payload when present, otherwise they are derived the same way
+// generate_3d_horn_torus colors the torus.
+
+const SCENE_MAGIC = 'RSC1';
+const RECORD_MAGIC = 'RTW1';
+const WIRE_VERSION = 1;
+const RECORD_SIZE = 24;
+
+const FLAG_RGB = 1;
+const FLAG_ALPHA = 2;
+const FLAG_DEFLATE = 4;
+
+function readMagic(view, offset) {
+  return String.fromCharCode(
+    view.getUint8(offset), view.getUint8(offset + 1), view.getUint8(offset + 2), view.getUint8(offset + 3));
+}
+
+async function inflate(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+// Port of colorsys.hls_to_rgb for one channel
+function hlsChannel(m1, m2, h) {
+  h = ((h % 1) + 1) % 1;
+  if (h < 1 / 6) return m1 + (m2 - m1) * h * 6;
+  if (h < 0.5) return m2;
+  if (h < 2 / 3) return m1 + (m2 - m1) * (2 / 3 - h) * 6;
+  return m1;
+}
+
+function quantize(value) {
+  return Math.round(Math.min(Math.max(value, 0), 1) * 255);
+}
+
+// Rows follow v and columns follow u, as in np.meshgrid(u, v)
+function torusPositions(resolution, radius) {
+  const positions = new Float32Array(resolution * resolution * 3);
+  const step = resolution > 1 ? (2 * Math.PI) / (resolution - 1) : 0;
+  for (let i = 0; i < resolution; i++) {
+    const v = i * step;
+    const ring = radius + radius * Math.cos(v + Math.PI);
+    const z = radius * Math.sin(v + Math.PI);
+    for (let j = 0; j < resolution; j++) {
+      const u = j * step;
+      const p = (i * resolution + j) * 3;
+      positions[p] = ring * Math.cos(u);
+      positions[p + 1] = ring * Math.sin(u);
+      positions[p + 2] = z;
+    }
+  }
+  return positions;
+}
+
+function torusColors(resolution, saturation) {
+  const colors = new Uint8Array(resolution * resolution * 4);
+  const step = resolution > 1 ? (2 * Math.PI) / (resolution - 1) : 0;
+  const m2 = 0.5 * (1 + saturation);
+  const m1 = 1 - m2;
+  for (let i = 0; i < resolution; i++) {
+    const alpha = quantize(1 - (i * step) / (2 * Math.PI));
+    for (let j = 0; j < resolution; j++) {
+      const hue = (j * step) / (2 * Math.PI);
+      const p = (i * resolution + j) * 4;
+      colors[p] = quantize(hlsChannel(m1, m2, hue + 1 / 3));
+      colors[p + 1] = quantize(hlsChannel(m1, m2, hue));
+      colors[p + 2] = quantize(hlsChannel(m1, m2, hue - 1 / 3));
+      colors[p + 3] = alpha;
+    }
+  }
+  return colors;
+}
+
+// Undo the per-row deltas along u into `channels` interleaved slots of `colors`
+function applyDeltas(payload, pos, resolution, colors, firstChannel, channels) {
+  for (let i = 0; i < resolution; i++) {
+    const acc = new Uint8Array(channels);
+    for (let j = 0; j < resolution; j++) {
+      const p = i * resolution + j;
+      for (let c = 0; c < channels; c++) {
+        acc[c] = acc[c] + payload[pos + p * channels + c];
+        colors[p * 4 + firstChannel + c] = acc[c];
+      }
+    }
+  }
+  return pos + resolution * resolution * channels;
+}
+
+// Decode one torus record; resolves to { resolution, radius, saturation, positions, scale, colors, next }.
+// Given `unitPositions`, the unit torus for the record's resolution, the record reuses them
+// with scale = radius instead of building its own positions.
+export async function decodeHornTorus(buffer, offset = 0, unitPositions = null) {
+  const view = new DataView(buffer);
+  if (readMagic(view, offset) !== RECORD_MAGIC || view.getUint8(offset + 4) !== WIRE_VERSION) {
+    throw new Error(`Not a version ${WIRE_VERSION} horn torus record`);
+  }
+  const flags = view.getUint8(offset + 5);
+  const resolution = view.getUint32(offset + 8, true);
+  const radius = view.getFloat32(offset + 12, true);
+  const saturation = view.getFloat32(offset + 16, true);
+  const size = view.getUint32(offset + 20, true);
+  const start = offset + RECORD_SIZE;
+
+  let payload = new Uint8Array(buffer, start, size);
+  if (flags & FLAG_DEFLATE) payload = await inflate(payload);
+
+  const positions = unitPositions || torusPositions(resolution, radius);
+  const scale = unitPositions ? radius : 1;
+  const colors = torusColors(resolution, saturation);
+  let pos = 0;
+  if (flags & FLAG_RGB) pos = applyDeltas(payload, pos, resolution, colors, 0, 3);
+  if (flags & FLAG_ALPHA) applyDeltas(payload, pos, resolution, colors, 3, 1);
+
+  return { resolution, radius, saturation, positions, scale, colors, next: start + size };
+}
+
+// Decode a scene of nested layers into an array of decoded records. With `instanced`, layers
+// of the same resolution share one unit-torus `positions` array, to be drawn scaled by
+// `scale` (e.g. one geometry with per-instance scale and colors); otherwise each layer gets
+// its own positions at its radius and scale is 1.
+export async function decodeScene(buffer, { instanced = false } = {}) {
+  const view = new DataView(buffer);
+  if (readMagic(view, 0) !== SCENE_MAGIC) throw new Error('Not a horn torus scene');
+  const count = view.getUint32(4, true);
+  const layers = [];
+  const units = new Map();
+  let offset = 8;
+  for (let i = 0; i < count; i++) {
+    let unit = null;
+    if (instanced) {
+      const resolution = view.getUint32(offset + 8, true);
+      if (!units.has(resolution)) units.set(resolution, torusPositions(resolution, 1));
+      unit = units.get(resolution);
+    }
+    const layer = await decodeHornTorus(buffer, offset, unit);
+    layers.push(layer);
+    offset = layer.next;
+  }
+  return layers;
+}
@@ -0,0 +1,42 @@
+"""ROSE WINDOW: a horn torus color space of developmental (u) and alchemical (v) color.
+
+Importing the package only needs NumPy. Rendering backends are imported the first
+time one of their functions is used, so batch jobs that only need geometry or color
+never pay for Plotly.
+"""
+import importlib
+import logging
+
+from rose.color import hls_to_rgb, horn_torus_rgba
+from rose.geometry import generate_3d_horn_torus, horn_torus_grid, torus_point
+
+# A library leaves logging configuration to the application that imports it
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# Backend functions, resolved on first attribute access
+_LAZY = {
+    'horn_torus_trace': 'rose.render',
+    'horn_torus_layout': 'rose.render',
+    'build_horn_torus_figure': 'rose.render',
+    'render_horn_torus_plotly': 'rose.render',
+}
+
+__all__ = [
+    'generate_3d_horn_torus',
+    'horn_torus_grid',
+    'torus_point',
+    'hls_to_rgb',
+    'horn_torus_rgba',
+    *_LAZY,
+]
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
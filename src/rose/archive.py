@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from rose import log
+from rose.geometry import generate_3d_horn_torus
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Memory-mapped archive of generated layers, so a service can start without regenerating.
+#
+# Layout: preamble, JSON header, then one raw little-endian array per field, each starting
+# on a 64-byte boundary:
+#
+#   x, y, z   float64 (layers, resolution, resolution)
+#   rgba      float64 (layers, resolution, resolution, 4)
+#
+# Opening reads only the preamble and header and maps the arrays with np.memmap, so it takes
+# the same time for any scene and pages in only what is touched. The header records the
+# generator fingerprint; an archive written by a different generator is rejected at open,
+# and load_or_build() rewrites it. A CRC32 per array is checked by verify(), which reads
+# everything and so is left to callers that want it.
+
+ARCHIVE_MAGIC = b'ROSEARCH'
+ARCHIVE_VERSION = 1
+# Bump for deliberate changes to generated layers that the fingerprint probe cannot see
+GENERATOR_VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sII')  # magic, archive version, header length
+FIELDS = ('x', 'y', 'z', 'rgba')
+
+# Identifies the generator: its version plus a hash of a small probe layer, so any change in
+# generated values invalidates existing archives without anyone remembering to bump a number
+def generator_fingerprint(color='hls'):
+    digest = hashlib.sha1(str(GENERATOR_VERSION).encode())
+    for array in generate_3d_horn_torus(7, radius=0.75, saturation=0.6, color_model=color):
+        digest.update(np.ascontiguousarray(array, dtype='<f8').tobytes())
+    return digest.hexdigest()
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _field_shapes(resolution, count):
+    grid = (count, resolution, resolution)
+    return {'x': grid, 'y': grid, 'z': grid, 'rgba': grid + (4,)}
+
+# Layers as a list of {radius, saturation}, as in a normalized render spec
+def _layer_list(layers):
+    return [{'radius': float(layer['radius']), 'saturation': float(layer['saturation'])} for layer in layers]
+
+def _header(resolution, layers, color, data_start=0):
+    arrays = {}
+    offset = data_start
+    for name, shape in _field_shapes(resolution, len(layers)).items():
+        offset = _aligned(offset)
+        arrays[name] = {'offset': offset, 'shape': shape, 'dtype': '<f8'}
+        offset += int(np.prod(shape)) * 8
+    return {'resolution': resolution, 'color': color, 'layers': _layer_list(layers),
+            'generator': generator_fingerprint(color), 'arrays': arrays, 'size': offset}
+
+# Generate every layer straight into a new archive at `path`
+def write_archive(path, resolution, layers, color='hls'):
+    started = log.start()
+    layers = _layer_list(layers)
+    # Offsets depend on the header length, which depends on the offsets: size the header with
+    # a generous placeholder start, then lay the arrays out after the real header
+    probe = _header(resolution, layers, color, data_start=10 ** 12)
+    probe['crc32'] = {name: 0xffffffff for name in FIELDS}
+    probe = json.dumps(probe).encode('utf-8')
+    header = _header(resolution, layers, color, data_start=_aligned(_PREAMBLE.size + len(probe)))
+
+    tmp_path = path + '.tmp'
+    with span('write archive', resolution=resolution, layers=len(layers)):
+        with open(tmp_path, 'wb') as f:
+            f.truncate(header['size'])
+        maps = {name: np.memmap(tmp_path, dtype=spec['dtype'], mode='r+', offset=spec['offset'],
+                                shape=tuple(spec['shape'])) for name, spec in header['arrays'].items()}
+        for i, layer in enumerate(layers):
+            generate_3d_horn_torus(resolution, layer['radius'], layer['saturation'], color,
+                                   out=tuple(maps[name][i] for name in FIELDS))
+        header['crc32'] = {name: zlib.crc32(array) for name, array in maps.items()}
+        for array in maps.values():
+            array.flush()
+        del maps
+
+        blob = json.dumps(header).encode('utf-8')
+        assert _PREAMBLE.size + len(blob) <= header['arrays']['x']['offset']
+        with open(tmp_path, 'r+b') as f:
+            f.write(_PREAMBLE.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(blob)) + blob)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    log.summary(logger, 'write_archive', started, logging.INFO, path=path, layers=len(layers), bytes=header['size'])
+    return path
+
+# Read-only, memory-mapped view of an archive; layer(i) returns (X, Y, Z, RGBA) like
+# generate_3d_horn_torus. Raises ValueError for archives of another format or generator.
+class LayerArchive:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+                raise ValueError(f"{path} is not a version {ARCHIVE_VERSION} ROSE layer archive")
+            self.header = json.loads(f.read(header_len))
+        if self.header['generator'] != generator_fingerprint(self.header['color']):
+            raise ValueError(f"{path} was written by a different generator")
+        if os.path.getsize(path) < self.header['size']:
+            raise ValueError(f"{path} is truncated")
+        self.resolution = self.header['resolution']
+        self.color = self.header['color']
+        self.layers = self.header['layers']
+        self.arrays = {name: np.memmap(path, dtype=spec['dtype'], mode='r', offset=spec['offset'],
+                                       shape=tuple(spec['shape']))
+                       for name, spec in self.header['arrays'].items()}
+
+    def __len__(self):
+        return len(self.layers)
+
+    def layer(self, index):
+        return tuple(self.arrays[name][index] for name in FIELDS)
+
+    def matches(self, resolution, layers, color='hls'):
+        return self.resolution == resolution and self.color == color and self.layers == _layer_list(layers)
+
+    # Compare every array with its recorded checksum; reads the whole archive
+    def verify(self):
+        return all(zlib.crc32(self.arrays[name]) == crc for name, crc in self.header['crc32'].items())
+
+# Open the archive at `path` if it holds exactly these layers from the current generator,
+# otherwise (re)write it first
+def load_or_build(path, resolution, layers, color='hls'):
+    try:
+        archive = LayerArchive(path)
+        if archive.matches(resolution, layers, color):
+            return archive
+        logger.info("Archive %s holds a different scene, rewriting it.", path)
+    except FileNotFoundError:
+        pass
+    except ValueError as error:
+        logger.info("Archive %s is stale (%s), rewriting it.", path, error)
+    write_archive(path, resolution, layers, color)
+    return LayerArchive(path)
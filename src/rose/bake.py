@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from rose import paths
+from rose.color import hls_to_rgb
+
+logger = logging.getLogger(__name__)
+
+PACK_MAGIC = b'ROSEPACK'
+PACK_VERSION = 1
+# Bump whenever journey geometry or thumbnails change so existing packs are rebaked in full
+GENERATOR_VERSION = 1
+
+# Website inputs, in the order they index the lattice
+AXES = ('radius', 'u_start', 'u_end', 'length')
+
+# Each axis is [min, max, steps], endpoints included
+DEFAULT_LATTICE = {
+    'radius': [0.25, 2.0, 8],
+    'u_start': [0.0, 2 * np.pi, 9],
+    'u_end': [0.0, 2 * np.pi, 9],
+    'length': [1.0, 8.0, 8],
+    'samples_per_cycle': 64,
+    'thumbnail': 48,
+}
+
+_PREAMBLE = struct.Struct('<8sII')  # magic, pack version, header length
+_ENTRY = struct.Struct('<II')  # point count, thumbnail length
+
+# Load a lattice config (JSON) on top of the defaults
+def load_lattice(path=None):
+    lattice = dict(DEFAULT_LATTICE)
+    if path is not None:
+        with open(path) as f:
+            lattice.update(json.load(f))
+    for axis in AXES:
+        lo, hi, steps = lattice[axis]
+        if int(steps) < 1 or hi < lo:
+            raise ValueError(f"Invalid lattice axis {axis}: {lattice[axis]!r}")
+        lattice[axis] = [float(lo), float(hi), int(steps)]
+    if min(lattice['length'][:2]) <= 0:
+        raise ValueError("Journey length must be positive")
+    return lattice
+
+def lattice_axes(lattice):
+    return {axis: np.linspace(*lattice[axis]) for axis in AXES}
+
+def lattice_shape(lattice):
+    return tuple(lattice[axis][2] for axis in AXES)
+
+# Parameter values of every lattice point, in flat (C) order
+def lattice_points(lattice):
+    axes = lattice_axes(lattice)
+    grids = np.meshgrid(*(axes[axis] for axis in AXES), indexing='ij')
+    return np.stack([g.ravel() for g in grids], axis=-1)
+
+# Minimal RGBA PNG encoder so thumbnails need nothing beyond NumPy and zlib
+def png_bytes(rgba):
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)) + chunk(b'IEND', b''))
+
+# Rasterize a journey seen from above at a tilt, colored by its developmental hue
+def journey_thumbnail(radius, u_start, u_end, length, size=48, tilt=np.pi / 3):
+    # Oversample the path so consecutive samples land in neighbouring pixels
+    _, u, v = paths.journey_angles(u_start, u_end, length, samples_per_cycle=size * 8)
+    x, y, z = paths.torus_point(u, v, radius)
+    px = (x / (4 * radius) + 0.5) * (size - 1)
+    py = ((y * np.cos(tilt) - z * np.sin(tilt)) / (4 * radius) + 0.5) * (size - 1)
+
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    rgb = hls_to_rgb(u / (2 * np.pi), 0.5, min(radius, 1.0))
+    rgba[np.rint(py).astype(int), np.rint(px).astype(int)] = np.concatenate(
+        [np.rint(rgb * 255), np.full((len(u), 1), 255)], axis=-1).astype(np.uint8)
+    return png_bytes(rgba[::-1])
+
+def bake_entry(params, lattice):
+    radius, u_start, u_end, length = params
+    points = paths.journey_points(radius, u_start, u_end, length, lattice['samples_per_cycle']).astype('<f4')
+    thumbnail = journey_thumbnail(radius, u_start, u_end, length, size=lattice['thumbnail'])
+    return _ENTRY.pack(len(points), len(thumbnail)) + points.tobytes() + thumbnail
+
+def decode_entry(blob):
+    count, thumb_len = _ENTRY.unpack_from(blob)
+    start = _ENTRY.size
+    points = np.frombuffer(blob, dtype='<f4', count=count * 3, offset=start).reshape(count, 3)
+    start += points.nbytes
+    return points, blob[start:start + thumb_len]
+
+# Read-only view of a baked pack; any entry is one seek + one read once the pack is open
+class BakedPack:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, version, header_len = _PREAMBLE.unpack(self._file.read(_PREAMBLE.size))
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} ROSE pack")
+        self.header = json.loads(self._file.read(header_len))
+        self.lattice = self.header['lattice']
+        self.shape = lattice_shape(self.lattice)
+        self.axes = lattice_axes(self.lattice)
+        count = int(np.prod(self.shape))
+        self._file.seek(_table_offset(header_len))
+        self.offsets = np.frombuffer(self._file.read(count * 16), dtype='<u8').reshape(count, 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def generator_version(self):
+        return self.header['generator_version']
+
+    def read(self, index):
+        offset, size = self.offsets[index]
+        self._file.seek(int(offset))
+        return self._file.read(int(size))
+
+    def entry(self, index):
+        return decode_entry(self.read(index))
+
+    # Flat index of the lattice point matching the parameters, or None if they are off-lattice
+    def index_of(self, radius, u_start, u_end, length, tolerance=1e-3):
+        index = []
+        for axis, value in zip(AXES, (radius, u_start, u_end, length)):
+            values = self.axes[axis]
+            i = int(np.abs(values - value).argmin())
+            step = values[1] - values[0] if len(values) > 1 else 1.0
+            if abs(values[i] - value) > tolerance * step:
+                return None
+            index.append(i)
+        return int(np.ravel_multi_index(index, self.shape))
+
+    def lookup(self, radius, u_start, u_end, length):
+        index = self.index_of(radius, u_start, u_end, length)
+        return None if index is None else self.entry(index)
+
+# The offset table starts on an 8-byte boundary after the JSON header
+def _table_offset(header_len):
+    return (_PREAMBLE.size + header_len + 7) // 8 * 8
+
+# Map parameter tuples of a previous pack to its entries so unchanged lattice points can be copied
+def _reusable_entries(previous, lattice):
+    if previous is None or not os.path.exists(previous):
+        return None, {}
+    pack = BakedPack(previous)
+    same_format = all(pack.lattice[k] == lattice[k] for k in ('samples_per_cycle', 'thumbnail'))
+    if pack.generator_version != GENERATOR_VERSION or not same_format:
+        logger.info("Previous pack %s is stale, rebaking everything.", previous)
+        pack.close()
+        return None, {}
+    points = lattice_points(pack.lattice)
+    return pack, {tuple(np.round(p, 9)): i for i, p in enumerate(points)}
+
+# Bake every lattice point into a pack at out_path, reusing entries from `previous` when possible
+def bake(lattice, out_path, previous=None):
+    points = lattice_points(lattice)
+    old_pack, reusable = _reusable_entries(previous, lattice)
+    header = json.dumps({
+        'lattice': lattice,
+        'generator_version': GENERATOR_VERSION,
+        'axes': AXES,
+    }).encode('utf-8')
+    table_offset = _table_offset(len(header))
+    offsets = np.zeros((len(points), 2), dtype='<u8')
+
+    tmp_path = out_path + '.tmp'
+    reused = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREAMBLE.pack(PACK_MAGIC, PACK_VERSION, len(header)) + header)
+            f.write(b'\0' * (table_offset - f.tell()))
+            f.write(offsets.tobytes())  # placeholder, rewritten once entry sizes are known
+            for i, params in enumerate(points):
+                old_index = reusable.get(tuple(np.round(params, 9)))
+                if old_index is None:
+                    blob = bake_entry(params, lattice)
+                else:
+                    blob = old_pack.read(old_index)
+                    reused += 1
+                offsets[i] = f.tell(), len(blob)
+                f.write(blob)
+            f.seek(table_offset)
+            f.write(offsets.tobytes())
+    finally:
+        if old_pack is not None:
+            old_pack.close()
+    os.replace(tmp_path, out_path)
+    logger.info("Baked %d entries into %s (%d reused, %d generated).",
+                 len(points), out_path, reused, len(points) - reused)
+    return out_path
+
+# Answer a journey request from the pack when it is on the lattice, otherwise generate it live
+def serve_journey(radius, u_start, u_end, length, pack=None):
+    lattice = DEFAULT_LATTICE if pack is None else pack.lattice
+    if pack is not None:
+        entry = pack.lookup(radius, u_start, u_end, length)
+        if entry is not None:
+            points, thumbnail = entry
+            return {'points': points, 'thumbnail': thumbnail, 'baked': True}
+    blob = bake_entry((radius, u_start, u_end, length), lattice)
+    points, thumbnail = decode_entry(blob)
+    return {'points': points, 'thumbnail': thumbnail, 'baked': False}
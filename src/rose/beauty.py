@@ -0,0 +1,105 @@
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.bake import AXES, lattice_points, load_lattice
+from rose.texture import path_colors
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Spectral "beauty" of Heros Journeys, scored in batches.
+#
+# A journey is a song of two voices: the alchemical color of v(t) and the developmental
+# color of u(t). Each is sampled at `samples` points over the journey, and the three color
+# channels of each plane form its signal. The song is heard on a loop, as a harmonic journey
+# returns to the singularity it left. One batched rfft over a (paths, planes, channels,
+# time) array gives every power spectrum, and from it:
+#
+#   harmonicity    how exactly the song repeats within the loop: the peak of the circular
+#                  autocorrelation (the inverse transform of the power spectrum) over lags
+#                  of 1/16 to 1/2 of the journey, after each voice's first zero crossing,
+#                  averaged over the two voices at their common lag. 1 for a pattern that
+#                  recurs exactly, as commensurate frequencies do; low for incommensurate
+#                  chaos.
+#   concentration  1 minus the normalized spectral entropy, averaged over the voices: high
+#                  when the energy sits in a few partials, low when it is spread like noise.
+#                  A voice that does not close on itself jumps where the loop restarts,
+#                  which spreads its spectrum.
+#   score          the geometric mean of the two.
+#
+# A voice whose color never changes is silent and scores 0 on both, so journeys that stand
+# still in one plane do not win. Saturation only scales the developmental signal, which the
+# normalization removes, so the radius does not change a journey's score.
+
+COLUMNS = AXES + ('period', 'harmonicity', 'concentration', 'score')
+SAMPLES = 512
+CHUNK = 1024  # journeys scored together: 12 MB of float32 signals at SAMPLES, plus their spectra
+
+# Random candidates over the ranges of a lattice (see bake.load_lattice), in AXES order
+def random_journeys(count, seed=0, lattice=None):
+    lattice = load_lattice() if lattice is None else lattice
+    rng = np.random.default_rng(seed)
+    return np.stack([rng.uniform(*lattice[axis][:2], count) for axis in AXES], axis=-1)
+
+# Color signals of journeys given as rows of AXES values: shape (paths, 2 planes, 3, samples)
+def journey_signals(params, samples=SAMPLES):
+    _, u_start, u_end, length = np.asarray(params, dtype=float).T
+    s = np.arange(samples) / samples
+    u = u_start[:, None] + (u_end - u_start)[:, None] * s
+    v = 2 * np.pi * length[:, None] * s
+    signals = np.empty((len(u), 2, 3, samples), dtype=np.float32)
+    signals[:, 0] = np.moveaxis(path_colors(u, v, 'alchemical')[..., :3], -1, 1)
+    signals[:, 1] = np.moveaxis(path_colors(u, v, 'hls')[..., :3], -1, 1)
+    return signals
+
+# Harmonicity, concentration and period (in journeys, nan if the song never repeats) of
+# signals from journey_signals
+def spectral_metrics(signals):
+    samples = signals.shape[-1]
+    signals = signals - signals.mean(axis=-1, keepdims=True)
+    power = np.abs(np.fft.rfft(signals, axis=-1)) ** 2
+    power = power.sum(axis=2)  # over channels: (paths, planes, frequencies)
+    autocorrelation = np.fft.irfft(power, n=samples, axis=-1)
+    energy = autocorrelation[..., :1]
+    voiced = energy[..., 0] > 1e-9 * samples
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = autocorrelation / energy
+        p = power[..., 1:] / power[..., 1:].sum(axis=-1, keepdims=True)
+        entropy = -np.sum(np.where(p > 0, p * np.log(p), 0), axis=-1) / np.log(p.shape[-1])
+    # Only peaks after a voice's first dip below zero are repetitions; before it, a slowly
+    # changing color merely resembles itself
+    repeating = voiced[..., None] & (np.cumsum(r < 0, axis=-1) > 0)
+    r = np.where(repeating, r, 0)
+    lags = slice(samples // 16, samples // 2 + 1)
+    combined = r[..., lags].mean(axis=1)
+    best = combined.argmax(axis=-1)
+    harmonicity = np.clip(np.take_along_axis(combined, best[:, None], axis=-1)[:, 0], 0, 1)
+    concentration = np.where(voiced, 1 - entropy, 0).mean(axis=1)
+    period = np.where(harmonicity > 0, (best + lags.start) / samples, np.nan)
+    return harmonicity, concentration, period
+
+# Score journeys (rows of AXES values) and rank them, most beautiful first. Returns a table
+# as a dict of COLUMNS arrays.
+def rank_journeys(params, samples=SAMPLES, chunk=CHUNK):
+    started = log.start()
+    params = np.asarray(params, dtype=float).reshape(-1, len(AXES))
+    harmonicity, concentration, period = (np.empty(len(params)) for _ in range(3))
+    with span('beauty', paths=len(params), samples=samples):
+        for start in range(0, len(params), chunk):
+            batch = slice(start, start + chunk)
+            harmonicity[batch], concentration[batch], period[batch] = spectral_metrics(
+                journey_signals(params[batch], samples))
+    score = np.sqrt(harmonicity * concentration)
+    order = np.argsort(-score, kind='stable')
+    table = {axis: params[order, i] for i, axis in enumerate(AXES)}
+    table.update(period=period[order] * table['length'], harmonicity=harmonicity[order],
+                 concentration=concentration[order], score=score[order])
+    log.summary(logger, 'rank_journeys', started, logging.INFO, paths=len(params),
+                best=float(score[order[0]]) if len(params) else None)
+    return table
+
+# Ranked journeys over the website's parameter lattice
+def rank_lattice(lattice=None, samples=SAMPLES):
+    return rank_journeys(lattice_points(load_lattice() if lattice is None else lattice), samples)
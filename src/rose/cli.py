@@ -0,0 +1,397 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from rose import gltf, log, paths, trace, wire
+from rose.log import configure_logging
+from rose.factored import COLOR_FACTORS, factored_horn_torus
+from rose.geometry import generate_3d_horn_torus
+from rose.spec import DEFAULT_PATH, EXPORT_FORMATS, FIGURE_FORMATS, SpecError, load_specs, normalize_spec
+
+logger = logging.getLogger(__name__)
+
+# Warm state shared by every spec run in one process, so a batch regenerates nothing twice
+class Session:
+    def __init__(self):
+        self._layers = {}
+        self._traces = {}
+        self._journeys = {}
+
+    # Separable color models are kept factored, so exports that need only the colors never
+    # build the coordinate grids; unpacking X, Y, Z, rgba builds them on demand
+    def layer(self, resolution, layer, color):
+        key = (resolution, layer['radius'], layer['saturation'], color)
+        if key not in self._layers:
+            if color in COLOR_FACTORS:
+                self._layers[key] = factored_horn_torus(
+                    resolution, radius=layer['radius'], saturation=layer['saturation'], color_model=color)
+            else:
+                self._layers[key] = generate_3d_horn_torus(
+                    resolution, radius=layer['radius'], saturation=layer['saturation'], color_model=color)
+        return self._layers[key]
+
+    # Serve layers from a memory-mapped archive (rose.archive) instead of generating them
+    def preload(self, archive):
+        for i, layer in enumerate(archive.layers):
+            key = (archive.resolution, layer['radius'], layer['saturation'], archive.color)
+            self._layers[key] = archive.layer(i)
+
+    def layers(self, spec):
+        return [self.layer(spec['resolution'], layer, spec['color']) for layer in spec['layers']]
+
+    def journey(self, path):
+        key = tuple(path[k] for k in ('radius', 'u_start', 'u_end', 'length', 'samples_per_cycle', 'spacing'))
+        if key not in self._journeys:
+            self._journeys[key] = paths.journey_angles(
+                path['u_start'], path['u_end'], path['length'], path['samples_per_cycle'], path['spacing'])
+        t, u, v = self._journeys[key]
+        return t, u, v, np.stack(paths.torus_point(u, v, path['radius']), axis=-1)
+
+    def figure(self, spec):
+        from rose import render
+        traces = []
+        for layer in spec['layers']:
+            key = (spec['resolution'], layer['radius'], layer['saturation'], spec['color'], spec['sampling'])
+            if key not in self._traces:
+                if spec['sampling'] == 'grid':
+                    arrays = self.layer(spec['resolution'], layer, spec['color'])
+                else:
+                    arrays = render.sample_layer(spec['resolution'], layer['radius'], layer['saturation'],
+                                                 spec['color'], spec['sampling'])
+                self._traces[key] = render.layer_trace(*arrays)
+            traces.append(self._traces[key])
+        for path in spec['paths']:
+            traces.append(render.path_trace(self.journey(path)[3], color=path['color']))
+        return render.build_figure(traces)
+
+def _write_figure(session, spec, output, figure):
+    if figure is None:
+        figure = session.figure(spec)
+    with trace.span('write ' + output['format'], path=output['path']):
+        if output['format'] == 'html':
+            figure.write_html(output['path'], include_plotlyjs='cdn')
+        elif output['format'] == 'json':
+            figure.write_json(output['path'])
+        else:
+            figure.write_image(output['path'])  # needs kaleido
+    return figure
+
+def _write_export(session, spec, output):
+    with trace.span('write ' + output['format'], path=output['path']):
+        _export(session, spec, output)
+
+def _export(session, spec, output):
+    if output['format'] == 'wire':
+        colors = [layer[3] for layer in session.layers(spec)]
+        with open(output['path'], 'wb') as f:
+            f.write(wire.encode_layers(spec['resolution'], spec['layers'], colors))
+    elif output['format'] == 'npz':
+        X, Y, Z, rgba = (np.stack(a) for a in zip(*session.layers(spec)))
+        arrays = {'x': X, 'y': Y, 'z': Z, 'rgba': rgba,
+                  'radius': np.array([layer['radius'] for layer in spec['layers']]),
+                  'saturation': np.array([layer['saturation'] for layer in spec['layers']])}
+        for i, path in enumerate(spec['paths']):
+            arrays[f'path{i}'] = session.journey(path)[3]
+        np.savez_compressed(output['path'], **arrays)
+    elif output['format'] == 'glb':
+        with open(output['path'], 'wb') as f:
+            f.write(gltf.encode_glb(spec['resolution'], spec['layers'], spec['color']))
+    else:
+        _write_paths_csv(output['path'], [session.journey(path) for path in spec['paths']])
+
+def _write_paths_csv(out, journeys):
+    rows = [np.column_stack([np.full(len(t), i), t, u, v, points]) for i, (t, u, v, points) in enumerate(journeys)]
+    table = np.concatenate(rows) if rows else np.empty((0, 7))
+    np.savetxt(out, table, delimiter=',', header='path,t,u,v,x,y,z', comments='', fmt=['%d'] + ['%.9g'] * 6)
+
+# Produce the outputs of one spec whose format is in `formats`
+def run_spec(session, spec, formats):
+    started = log.start()
+    figure = None
+    with trace.span('spec', name=spec['name']):
+        for output in spec['outputs']:
+            if output['format'] not in formats:
+                continue
+            os.makedirs(os.path.dirname(os.path.abspath(output['path'])), exist_ok=True)
+            if output['format'] in FIGURE_FORMATS:
+                figure = _write_figure(session, spec, output, figure)
+            else:
+                _write_export(session, spec, output)
+            print(output['path'])
+    log.summary(logger, 'spec', started, logging.INFO, name=spec['name'])
+
+def _specs(files):
+    specs = []
+    for path in files:
+        specs.extend(load_specs(path))
+    return specs
+
+def _session(args):
+    session = Session()
+    if args.archive:
+        from rose.archive import LayerArchive
+        try:
+            session.preload(LayerArchive(args.archive))
+        except (OSError, ValueError) as error:
+            logger.warning("Not using archive %s: %s", args.archive, error)
+    return session
+
+def cmd_run(args, formats):
+    session = _session(args)
+    specs = _specs(args.specs) or [normalize_spec({})]
+    for spec in specs:
+        run_spec(session, spec, formats)
+    # `rose render` without figure outputs opens the scene, like the old script did
+    if formats == FIGURE_FORMATS and (args.show or not any(o['format'] in formats for s in specs for o in s['outputs'])):
+        for spec in specs:
+            session.figure(spec).show(renderer='browser')  # Open in the default web browser
+    return 0
+
+def cmd_path(args):
+    path = dict(DEFAULT_PATH, radius=args.radius, u_start=args.u_start, u_end=args.u_end,
+                length=args.length, samples_per_cycle=args.samples_per_cycle, spacing=args.spacing)
+    journey = Session().journey(path)
+    if args.ranked:
+        from rose import simplify
+        data = simplify.encode_ranked(journey[3])
+        if args.output:
+            with open(args.output, 'wb') as f:
+                f.write(data)
+        else:
+            sys.stdout.buffer.write(data)
+        return 0
+    _write_paths_csv(args.output or sys.stdout, [journey])
+    return 0
+
+def cmd_song(args):
+    from rose import song
+    params = dict(u_start=args.u_start, u_end=args.u_end, length=args.length, radius=args.radius,
+                  seconds=args.seconds, tempo=args.tempo, pitch=args.pitch, rate=args.rate)
+    write = song.write_raw if args.raw else song.write_wav
+    if args.output:
+        with open(args.output, 'wb') as f:
+            write(f, **params)
+    else:
+        write(sys.stdout.buffer, **params)
+        sys.stdout.buffer.flush()
+    return 0
+
+# Journeys to analyze, as rows of bake.AXES: the lattice's points or --random of its ranges
+def _candidates(args):
+    from rose import bake, beauty
+    lattice = bake.load_lattice(args.lattice)
+    if args.random:
+        return beauty.random_journeys(args.random, seed=args.seed, lattice=lattice)
+    return bake.lattice_points(lattice)
+
+def _write_table(out, table, columns):
+    rows = np.column_stack([table[column] for column in columns])
+    np.savetxt(out or sys.stdout, rows, delimiter=',', header=','.join(columns), comments='', fmt='%.6g')
+
+def cmd_beauty(args):
+    from rose import beauty
+    table = beauty.rank_journeys(_candidates(args))
+    _write_table(args.output, {column: values[:args.top] for column, values in table.items()}, beauty.COLUMNS)
+    return 0
+
+def cmd_coverage(args):
+    from rose import bake, coverage
+    table = coverage.journey_statistics(_candidates(args), args.samples_per_cycle, args.bins)
+    _write_table(args.output, table, bake.AXES + coverage.STATISTICS)
+    return 0
+
+def cmd_dwell(args):
+    from rose import bake, dwell
+    table = dwell.dwell_table(_candidates(args), args.samples_per_cycle, args.sectors)
+    _write_table(args.output, table, bake.AXES + dwell.ARCS + dwell.hue_columns(args.sectors))
+    return 0
+
+def cmd_bake(args):
+    from rose import bake
+    bake.bake(bake.load_lattice(args.lattice), args.out, previous=args.previous or args.out)
+    return 0
+
+def cmd_archive(args):
+    from rose import archive
+    specs = _specs(args.specs) or [normalize_spec({})]
+    if len(specs) != 1:
+        raise SpecError("rose archive takes exactly one spec")
+    spec = specs[0]
+    archive.write_archive(args.out, spec['resolution'], spec['layers'], spec['color'])
+    print(args.out)
+    return 0
+
+def cmd_volume(args):
+    from rose import volume
+    from rose.bake import png_bytes
+    specs = _specs(args.specs) or [normalize_spec({})]
+    if len(specs) != 1:
+        raise SpecError("rose volume takes exactly one spec")
+    spec = specs[0]
+    radius = max(layer['radius'] for layer in spec['layers'])
+    image = volume.render_volume(args.width, args.height, radius, len(spec['layers']), spec['color'],
+                                 steps=args.steps)
+    rgba = np.concatenate([image, np.ones(image.shape[:2] + (1,))], axis=-1)
+    with open(args.out, 'wb') as f:
+        f.write(png_bytes(wire.quantize(rgba)))
+    print(args.out)
+    return 0
+
+def _timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def cmd_bench(args):
+    specs = _specs(args.specs) or [normalize_spec({})]
+    for spec in specs:
+        stages = {
+            'generate': lambda: Session().layers(spec),
+            'figure': lambda: Session().figure(spec),
+            'figure json': lambda: Session().figure(spec).to_json(),
+            'wire': lambda: wire.encode_layers(spec['resolution'], spec['layers'],
+                                               [layer[3] for layer in Session().layers(spec)]),
+        }
+        warm = Session()
+        warm.figure(spec)
+        stages['figure (warm)'] = lambda: warm.figure(spec)
+        print(f"{spec['name']}: resolution {spec['resolution']}, {len(spec['layers'])} layers")
+        for name, fn in stages.items():
+            print(f"  {name:16s} {_timed(fn, args.repeat) * 1000:10.1f} ms")
+    return 0
+
+# argparse types for values that must be above zero; nan is rejected too
+def _positive(convert):
+    def parse(text):
+        value = convert(text)
+        if not value > 0:
+            raise argparse.ArgumentTypeError(f"must be positive, got {text}")
+        return value
+    parse.__name__ = convert.__name__  # argparse names the type in "invalid float value" errors
+    return parse
+
+positive_float = _positive(float)
+positive_int = _positive(int)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='rose', description="Render and export the ROSE WINDOW horn torus.")
+    parser.add_argument('-v', '--verbose', action='count', default=0, help="log progress (-vv for debug)")
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text')
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace of the run to PATH")
+    parser.add_argument('--trace-memory', action='store_true', help="record allocations in the trace")
+    parser.add_argument('--archive', metavar='PATH', help="map layers from an archive written by `rose archive`")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    render = commands.add_parser('render', help="write the figure outputs (html, json, png) of specs")
+    render.add_argument('specs', nargs='*', help="JSON/YAML spec files; the default scene if omitted")
+    render.add_argument('--show', action='store_true', help="also open each figure in the browser")
+    render.set_defaults(run=lambda args: cmd_run(args, FIGURE_FORMATS))
+
+    export = commands.add_parser('export', help="write the data outputs (wire, npz, csv, glb) of specs")
+    export.add_argument('specs', nargs='+')
+    export.set_defaults(run=lambda args: cmd_run(args, EXPORT_FORMATS))
+
+    batch = commands.add_parser('batch', help="write every output of many specs in one process")
+    batch.add_argument('specs', nargs='+')
+    batch.set_defaults(run=lambda args: cmd_run(args, FIGURE_FORMATS + EXPORT_FORMATS))
+
+    path = commands.add_parser('path', help="sample a Heros Journey as CSV (t, u, v, x, y, z)")
+    path.add_argument('--radius', type=float, default=DEFAULT_PATH['radius'])
+    path.add_argument('--u-start', type=float, default=DEFAULT_PATH['u_start'])
+    path.add_argument('--u-end', type=float, default=DEFAULT_PATH['u_end'])
+    path.add_argument('--length', type=positive_float, default=DEFAULT_PATH['length'])
+    path.add_argument('--samples-per-cycle', type=positive_int, default=DEFAULT_PATH['samples_per_cycle'])
+    path.add_argument('--spacing', choices=paths.SPACINGS, default=DEFAULT_PATH['spacing'],
+                      help="spread samples evenly in t, in arc length, or by curvature")
+    path.add_argument('--ranked', action='store_true',
+                      help="write a ranked stream (rose.simplify) whose prefixes are progressively finer paths")
+    path.add_argument('-o', '--output', help="file to write instead of stdout")
+    path.set_defaults(run=cmd_path)
+
+    song = commands.add_parser('song', help="stream a Heros Journey's song as WAV (or raw float32) audio")
+    song.add_argument('--radius', type=float, default=DEFAULT_PATH['radius'])
+    song.add_argument('--u-start', type=float, default=DEFAULT_PATH['u_start'])
+    song.add_argument('--u-end', type=float, default=DEFAULT_PATH['u_end'])
+    song.add_argument('--length', type=positive_float, default=DEFAULT_PATH['length'])
+    song.add_argument('--seconds', type=positive_float, help="duration; one journey at the tempo if omitted")
+    song.add_argument('--tempo', type=positive_float, default=0.5, help="alchemical cycles per second")
+    song.add_argument('--pitch', type=positive_float, default=220.0, help="frequency of the alchemical voice in Hz")
+    song.add_argument('--rate', type=positive_int, default=44100)
+    song.add_argument('--raw', action='store_true', help="write raw float32 stereo instead of WAV")
+    song.add_argument('-o', '--output', help="file to write instead of stdout")
+    song.set_defaults(run=cmd_song)
+
+    beauty = commands.add_parser('beauty', help="rank Heros Journeys by the spectral beauty of their songs (CSV)")
+    beauty.add_argument('--lattice', help="JSON lattice config overriding the website's defaults")
+    beauty.add_argument('--random', type=positive_int, metavar='N', help="score N random journeys instead of the lattice")
+    beauty.add_argument('--seed', type=int, default=0)
+    beauty.add_argument('--top', type=int, default=20, help="rows to print")
+    beauty.add_argument('-o', '--output', help="CSV file to write instead of stdout")
+    beauty.set_defaults(run=cmd_beauty)
+
+    coverage = commands.add_parser('coverage', help="count coverage, revisits and self-intersections of Heros Journeys (CSV)")
+    coverage.add_argument('--lattice', help="JSON lattice config overriding the website's defaults")
+    coverage.add_argument('--random', type=positive_int, metavar='N', help="measure N random journeys instead of the lattice")
+    coverage.add_argument('--seed', type=int, default=0)
+    coverage.add_argument('--samples-per-cycle', type=positive_int, default=DEFAULT_PATH['samples_per_cycle'])
+    coverage.add_argument('--bins', type=positive_int, default=256, help="grid cells along each of u and v")
+    coverage.add_argument('-o', '--output', help="CSV file to write instead of stdout")
+    coverage.set_defaults(run=cmd_coverage)
+
+    dwell = commands.add_parser('dwell', help="time Heros Journeys spend in each alchemical arc and hue sector (CSV)")
+    dwell.add_argument('--lattice', help="JSON lattice config overriding the website's defaults")
+    dwell.add_argument('--random', type=positive_int, metavar='N', help="measure N random journeys instead of the lattice")
+    dwell.add_argument('--seed', type=int, default=0)
+    dwell.add_argument('--samples-per-cycle', type=positive_int, default=DEFAULT_PATH['samples_per_cycle'])
+    dwell.add_argument('--sectors', type=positive_int, default=12, help="developmental hue sectors")
+    dwell.add_argument('-o', '--output', help="CSV file to write instead of stdout")
+    dwell.set_defaults(run=cmd_dwell)
+
+    archive = commands.add_parser('archive', help="write a spec's layers to a memory-mapped archive")
+    archive.add_argument('out', help="archive file to write")
+    archive.add_argument('specs', nargs='*', help="JSON/YAML spec file; the default scene if omitted")
+    archive.set_defaults(run=cmd_archive)
+
+    volume = commands.add_parser('volume', help="ray march a spec's layers as one continuous volume to a PNG")
+    volume.add_argument('out', help="PNG file to write")
+    volume.add_argument('specs', nargs='*', help="JSON/YAML spec file; the default scene if omitted")
+    volume.add_argument('--width', type=positive_int, default=600)
+    volume.add_argument('--height', type=positive_int, default=600)
+    volume.add_argument('--steps', type=positive_int, default=192, help="samples per ray")
+    volume.set_defaults(run=cmd_volume)
+
+    bake = commands.add_parser('bake', help="precompute journeys over the website's parameter lattice")
+    bake.add_argument('out', help="pack file to write")
+    bake.add_argument('--lattice', help="JSON lattice config overriding the defaults")
+    bake.add_argument('--previous', help="pack to reuse unchanged entries from (defaults to OUT)")
+    bake.set_defaults(run=cmd_bake)
+
+    bench = commands.add_parser('bench', help="time each pipeline stage for specs")
+    bench.add_argument('specs', nargs='*')
+    bench.add_argument('--repeat', type=positive_int, default=3)
+    bench.set_defaults(run=cmd_bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+    configure_logging(level, fmt=args.log_format)
+    if args.trace:
+        trace.enable(memory=args.trace_memory)
+    try:
+        with trace.span(args.command):
+            return args.run(args)
+    except SpecError as exc:
+        print(f"rose: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if args.trace:
+            trace.snapshot('end of run')
+            trace.disable().write(args.trace)
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Vectorized equivalent of colorsys.hls_to_rgb for arrays of hue, lightness and saturation
+def hls_to_rgb(hue, lightness, saturation):
+    hue, lightness, saturation = np.broadcast_arrays(
+        np.asarray(hue, dtype=float), np.asarray(lightness, dtype=float), np.asarray(saturation, dtype=float))
+    m2 = np.where(lightness <= 0.5, lightness * (1.0 + saturation), lightness + saturation - lightness * saturation)
+    m1 = 2.0 * lightness - m2
+
+    def channel(h):
+        h = h % 1.0
+        return np.select(
+            [h < 1 / 6, h < 0.5, h < 2 / 3],
+            [m1 + (m2 - m1) * h * 6.0, m2, m1 + (m2 - m1) * (2 / 3 - h) * 6.0],
+            default=m1,
+        )
+
+    return np.stack([channel(hue + 1 / 3), channel(hue), channel(hue - 1 / 3)], axis=-1)
+
+# RGBA for points of the horn torus: hue from u, opacity from v, at fixed lightness
+def horn_torus_rgba(U, V, saturation=1.0):
+    rgba = np.empty(np.shape(U) + (4,))
+    rgba[..., :3] = hls_to_rgb(U / (2 * np.pi), 0.5, saturation)  # Fixed lightness for vibrant colors
+    # Opacity determined by v(t), with value ranging from 0 (at center) to 1 (outermost point)
+    rgba[..., 3] = 1 - V / (2 * np.pi)
+    return rgba
+
+# The 11 arcs of the alchemical circle in order of increasing v, starting at the -G singularity
+# (v = 0) and ending back at it. The Face (pi/2 to 3 pi/2) carries the rainbow with Green
+# opposite -G; the Dark Side carries White and IR before the Face, UV and Black after it.
+ALCHEMICAL_ARCS = (
+    ('White', 0.0, np.pi / 4),
+    ('IR', np.pi / 4, np.pi / 2),
+    *((name, np.pi / 2 + i * np.pi / 7, np.pi / 2 + (i + 1) * np.pi / 7)
+      for i, name in enumerate(('Red', 'Orange', 'Yellow', 'Green', 'Blue', 'Indigo', 'Violet'))),
+    ('UV', 3 * np.pi / 2, 7 * np.pi / 4),
+    ('Black', 7 * np.pi / 4, 2 * np.pi),
+)
+
+# Color at the middle of each gradient arc; White and Black are pure throughout their arcs
+ALCHEMICAL_COLORS = {
+    'White': (1.0, 1.0, 1.0),
+    'IR': (0.45, 0.0, 0.05),
+    'Red': (1.0, 0.0, 0.0),
+    'Orange': (1.0, 0.5, 0.0),
+    'Yellow': (1.0, 1.0, 0.0),
+    'Green': (0.0, 0.8, 0.0),
+    'Blue': (0.0, 0.3, 1.0),
+    'Indigo': (0.29, 0.0, 0.51),
+    'Violet': (0.56, 0.0, 1.0),
+    'UV': (0.25, 0.0, 0.4),
+    'Black': (0.0, 0.0, 0.0),
+}
+
+# Knots of the alchemical color line: constant over White and Black, and through the middle of
+# every other arc, so each gradient arc runs from its neighbours' hues towards its own
+def _alchemical_knots():
+    knots = []
+    for name, start, end in ALCHEMICAL_ARCS:
+        if name in ('White', 'Black'):
+            knots += [(start, ALCHEMICAL_COLORS[name]), (end, ALCHEMICAL_COLORS[name])]
+        else:
+            knots.append(((start + end) / 2, ALCHEMICAL_COLORS[name]))
+    v, rgb = zip(*knots)
+    return np.array(v), np.array(rgb)
+
+_ALCHEMICAL_V, _ALCHEMICAL_RGB = _alchemical_knots()
+
+# v taken modulo 2 pi, except that positive multiples of 2 pi stay 2 pi: the end of Black that
+# closes a cycle, rather than the White that opens the next one. A v counts as a multiple when
+# it is within CLOSE_ULPS units in the last place of one, i.e. only up to the rounding of 2 pi k.
+CLOSE_ULPS = 8
+
+def circle_angle(v):
+    v = np.asarray(v, dtype=float)
+    wrapped = np.mod(v, 2 * np.pi)
+    tolerance = CLOSE_ULPS * np.spacing(v)
+    closes = (v > 0) & ((wrapped <= tolerance) | (2 * np.pi - wrapped <= tolerance))
+    return np.where(closes, 2 * np.pi, wrapped)
+
+# Name of the alchemical arc containing each v
+def alchemical_arc(v):
+    starts = np.array([start for _, start, _ in ALCHEMICAL_ARCS])
+    index = np.clip(np.searchsorted(starts, circle_angle(v), side='right') - 1, 0, len(starts) - 1)
+    return np.array([name for name, _, _ in ALCHEMICAL_ARCS])[index]
+
+# Color of the alchemical circle at each v, shape (..., 3)
+def alchemical_rgb(v):
+    v = circle_angle(v)
+    return np.stack([np.interp(v, _ALCHEMICAL_V, _ALCHEMICAL_RGB[:, c]) for c in range(3)], axis=-1)
+
+# RGBA for points of the horn torus colored by the alchemical circle alone, with the same
+# opacity as horn_torus_rgba. Saturation is unused: the alchemical color depends on v only.
+def alchemical_rgba(U, V, saturation=1.0):
+    rgba = np.empty(np.shape(U) + (4,))
+    rgba[..., :3] = alchemical_rgb(V)
+    rgba[..., 3] = 1 - V / (2 * np.pi)
+    return rgba
+
+# Surface color models selectable by name, e.g. from render specs
+COLOR_MODELS = {
+    'hls': horn_torus_rgba,
+    'alchemical': alchemical_rgba,
+}
@@ -0,0 +1,190 @@
+import logging
+
+import numpy as np
+
+from rose import log, paths
+from rose.bake import AXES
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Coverage, revisits and self-intersections of paths, via a uniform grid over (u, v).
+#
+# The torus is cut into bins x bins cells of the (u, v) square, with both angles periodic, and
+# every path is split into pieces no longer than half a cell. A piece then touches only
+# its own cell and the next one, and two pieces that cross start in the same or in
+# neighbouring cells. One sort of the pieces by cell answers every question in about
+# linear time, instead of comparing all pairs of samples:
+#
+#   coverage       fraction of cells a path passes through
+#   area_coverage  the same weighted by surface area, which vanishes towards the singularity
+#   revisits       entries into a cell the path has already been in
+#   crossings      points where the path crosses itself in (u, v)
+#   passages       times the path passes through the singularity, v = 0 (mod 2 pi)
+#
+# All paths of a batch are processed together. The singularity is a single point of the
+# surface, so every passage after the first meets the path there again. Those meetings
+# are counted as passages rather than crossings. A constant-rate Lissajous path is a
+# straight line on the (u, v) square and meets itself only there.
+
+GRID = 256
+STATISTICS = ('samples', 'cells', 'coverage', 'area_coverage', 'visits', 'revisits', 'crossings', 'passages')
+
+# One path as (n,) arrays, a batch of equal-length paths as (paths, n), or lists of 1-D arrays;
+# returns the concatenated angles, each sample's path number and the path count
+def _batch(u, v):
+    if isinstance(u, (list, tuple)):
+        us = [np.asarray(a, dtype=float).ravel() for a in u]
+        vs = [np.asarray(a, dtype=float).ravel() for a in v]
+    else:
+        us = list(np.atleast_2d(np.asarray(u, dtype=float)))
+        vs = list(np.atleast_2d(np.asarray(v, dtype=float)))
+    lengths = [len(a) for a in us]
+    return np.concatenate(us), np.concatenate(vs), np.repeat(np.arange(len(us)), lengths), len(us)
+
+# Split every segment into pieces at most half a cell long. Returns the sample each piece
+# belongs to, its start (unwrapped) and its step. The last sample of each path becomes
+# one zero-length piece, so the pieces trace every path in order.
+def _pieces(u, v, path, bins):
+    du = np.zeros_like(u)
+    dv = np.zeros_like(v)
+    joined = path[:-1] == path[1:]
+    du[:-1] = np.where(joined, np.diff(u), 0)
+    dv[:-1] = np.where(joined, np.diff(v), 0)
+    half_cell = np.pi / bins
+    count = np.maximum(np.ceil(np.maximum(np.abs(du), np.abs(dv)) / half_cell), 1).astype(np.intp)
+    owner = np.repeat(np.arange(len(u)), count)
+    first = np.repeat(np.cumsum(count) - count, count)
+    step = 1 / count[owner]
+    s = (np.arange(len(owner)) - first) * step
+    return owner, u[owner] + s * du[owner], v[owner] + s * dv[owner], du[owner] * step, dv[owner] * step
+
+def _cells(u, v, bins):
+    scale = bins / (2 * np.pi)
+    row = np.floor(v * scale).astype(np.intp) % bins
+    column = np.floor(u * scale).astype(np.intp) % bins
+    return row, column
+
+# Fraction of the surface in each row of cells: the area element integrates to v - sin v
+def row_area(bins):
+    edges = np.linspace(0, 2 * np.pi, bins + 1)
+    return np.diff(edges - np.sin(edges)) / (2 * np.pi)
+
+# Visits per cell of one path, shape (bins, bins) with rows along v and columns along u
+def visit_counts(u, v, bins=GRID):
+    u, v, path, _ = _batch(u, v)
+    owner, pu, pv, _, _ = _pieces(u, v, path, bins)
+    row, column = _cells(pu, pv, bins)
+    cell = row * bins + column
+    entered = np.r_[True, (cell[1:] != cell[:-1]) | (path[owner][1:] != path[owner][:-1])]
+    return np.bincount(cell[entered], minlength=bins * bins).reshape(bins, bins)
+
+# Points where paths cross themselves in (u, v), as a dict of arrays: the path, the indices
+# of the samples starting the two crossing segments, and the crossing's (u, v) in [0, 2 pi)
+def self_intersections(u, v, bins=GRID):
+    u, v, path, _ = _batch(u, v)
+    return _crossings(u, v, path, bins)
+
+# Neighbouring cells to pair each cell with; the other four are covered from the other side
+_NEIGHBOURS = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+CHUNK = 1 << 14  # occupied cells whose candidate segment pairs, with their neighbours', are built at once
+
+def _crossings(u, v, path, bins):
+    owner, pu, pv, du, dv = _pieces(u, v, path, bins)
+    moving = (du != 0) | (dv != 0)
+    owner, pu, pv, du, dv = owner[moving], pu[moving], pv[moving], du[moving], dv[moving]
+    row, column = _cells(pu, pv, bins)
+    key = (path[owner] * bins + row) * bins + column
+    order = np.argsort(key, kind='stable')
+    # Occupied cells, each a run of `order`
+    cells, first, size = np.unique(key[order], return_index=True, return_counts=True)
+    cell_base, cell_row, cell_column = cells // (bins * bins) * (bins * bins), cells // bins % bins, cells % bins
+    found = []
+    with span('crossing candidates', pieces=len(owner), cells=len(cells)):
+        for start in range(0, len(cells), CHUNK):
+            chunk = np.arange(start, min(start + CHUNK, len(cells)))
+            for dr, dc in _NEIGHBOURS:
+                neighbour = (cell_base[chunk] + (cell_row[chunk] + dr) % bins * bins
+                             + (cell_column[chunk] + dc) % bins)
+                other = np.minimum(np.searchsorted(cells, neighbour), len(cells) - 1)
+                occupied = cells[other] == neighbour
+                here, there = chunk[occupied], other[occupied]
+                # Every piece of one cell against every piece of the other
+                pairs = size[here] * size[there]
+                pair = np.repeat(np.arange(len(here)), pairs)
+                k = np.arange(pairs.sum()) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+                width = size[there][pair]
+                a = order[first[here][pair] + k // width]
+                b = order[first[there][pair] + k % width]
+                # Never two pieces of the same or of adjacent segments; within a cell, each pair once
+                apart = np.abs(owner[b] - owner[a]) > 1
+                if dr == dc == 0:
+                    apart &= owner[b] > owner[a]
+                a, b = a[apart], b[apart]
+                found.append(_intersect(a, b, pu, pv, du, dv))
+    a, b, t = (np.concatenate(parts) for parts in zip(*found)) if found else (np.empty(0, np.intp),) * 3
+    # Report each crossing from the earlier segment
+    swap = owner[a] > owner[b]
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    return {
+        'path': path[owner[a]],
+        'first': owner[a],
+        'second': owner[b],
+        'u': (pu[a] + t * du[a]) % (2 * np.pi) if len(a) else np.empty(0),
+        'v': (pv[a] + t * dv[a]) % (2 * np.pi) if len(a) else np.empty(0),
+    }
+
+# Candidate piece pairs (a, b) that cross, with the position t along a of each crossing
+def _intersect(a, b, pu, pv, du, dv):
+    # Bring b's start to the copy of the square nearest a's start
+    qu = pu[b] - 2 * np.pi * np.round((pu[b] - pu[a]) / (2 * np.pi)) - pu[a]
+    qv = pv[b] - 2 * np.pi * np.round((pv[b] - pv[a]) / (2 * np.pi)) - pv[a]
+    denominator = du[a] * dv[b] - dv[a] * du[b]
+    # Parallel, up to rounding: collinear pieces of a straight path never cross
+    crossing = np.abs(denominator) > 1e-9 * np.hypot(du[a], dv[a]) * np.hypot(du[b], dv[b])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (qu * dv[b] - qv * du[b]) / denominator
+        s = (qu * dv[a] - qv * du[a]) / denominator
+    hit = crossing & (t >= 0) & (t < 1) & (s >= 0) & (s < 1)
+    return a[hit], b[hit], t[hit]
+
+# STATISTICS of every path in a batch, as a dict of (paths,) arrays
+def path_statistics(u, v, bins=GRID):
+    started = log.start()
+    u, v, path, count = _batch(u, v)
+    with span('path statistics', paths=count, samples=len(u), bins=bins):
+        owner, pu, pv, _, _ = _pieces(u, v, path, bins)
+        row, column = _cells(pu, pv, bins)
+        piece_path = path[owner]
+        key = piece_path * bins * bins + row * bins + column
+        entered = np.r_[True, key[1:] != key[:-1]]
+        visited, first = np.unique(key, return_index=True)
+        visited_path = visited // (bins * bins)
+        cells = np.bincount(visited_path, minlength=count)
+        area = np.bincount(visited_path, weights=row_area(bins)[row[first]] / bins, minlength=count)
+        visits = np.bincount(piece_path[entered], minlength=count)
+        lap = np.floor(v / (2 * np.pi))
+        passages = np.bincount(path[1:], weights=np.abs(np.diff(lap)) * (path[1:] == path[:-1]), minlength=count)
+        crossings = np.bincount(_crossings(u, v, path, bins)['path'], minlength=count)
+    statistics = {
+        'samples': np.bincount(path, minlength=count),
+        'cells': cells,
+        'coverage': cells / (bins * bins),
+        'area_coverage': area,
+        'visits': visits,
+        'revisits': visits - cells,
+        'crossings': crossings,
+        'passages': passages.astype(np.intp),
+    }
+    log.summary(logger, 'path_statistics', started, paths=count, samples=len(u), bins=bins)
+    return statistics
+
+# Statistics of Heros Journeys given as rows of AXES values, as a table: a dict of AXES and
+# STATISTICS arrays
+def journey_statistics(params, samples_per_cycle=200, bins=GRID):
+    params = np.asarray(params, dtype=float).reshape(-1, len(AXES))
+    angles = [paths.journey_angles(u_start, u_end, length, samples_per_cycle)[1:]
+              for _, u_start, u_end, length in params]
+    table = {axis: params[:, i] for i, axis in enumerate(AXES)}
+    table.update(path_statistics([u for u, _ in angles], [v for _, v in angles], bins))
+    return table
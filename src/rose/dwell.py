@@ -0,0 +1,113 @@
+import collections
+import logging
+
+import numpy as np
+
+from rose import log, paths
+from rose.bake import AXES
+from rose.color import ALCHEMICAL_ARCS, circle_angle
+from rose.spec import DEFAULT_PATH
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# How long a journey dwells in each alchemical arc and each developmental hue sector.
+#
+# A sample stands for the time halfway to its neighbours, so the histograms are right
+# however the samples are spaced (see paths.SPACINGS). Samples are binned with np.digitize,
+# and the times of a whole batch of paths go into one np.bincount keyed by path * bins + bin,
+# so there is no Python loop over samples or paths. Times are in alchemical cycles, the
+# unit of t, and the histograms of a path sum to its length.
+#
+# The histograms of the last CACHE_SIZE path specs are kept, so annotating a catalog computes
+# each journey once however often it is asked for. The radius never changes the angles and is
+# not part of the key.
+
+ARCS = tuple(name for name, _, _ in ALCHEMICAL_ARCS)
+HUE_SECTORS = 12
+CHUNK = 1024  # specs sampled together: up to 1.6 million samples for 8-cycle journeys at 200 per cycle
+CACHE_SIZE = 1 << 16  # path specs kept, least recently used first out
+_ARC_EDGES = np.array([start for _, start, _ in ALCHEMICAL_ARCS[1:]])
+_KEY = ('u_start', 'u_end', 'length', 'samples_per_cycle', 'spacing')
+_cache = collections.OrderedDict()
+
+# Column names of the hue sectors, by their starting hue in degrees
+def hue_columns(sectors=HUE_SECTORS):
+    return tuple(f'hue_{360 * i // sectors}' for i in range(sectors))
+
+# Index into ARCS of the arc holding each v; the same arcs as color.alchemical_arc
+def arc_index(v):
+    return np.digitize(circle_angle(v), _ARC_EDGES)
+
+# Index of the hue sector holding each u
+def hue_index(u, sectors=HUE_SECTORS):
+    return np.digitize(np.mod(u, 2 * np.pi), np.arange(1, sectors) * (2 * np.pi / sectors))
+
+# Time each sample stands for: half the gap to each neighbour
+def sample_times(t):
+    t = np.asarray(t, dtype=float)
+    gaps = np.diff(t) / 2
+    weights = np.zeros_like(t)
+    weights[:-1] += gaps
+    weights[1:] += gaps
+    return weights
+
+# Dwell-time histograms of a batch of paths: t, u and v as (n,) arrays for one path, (paths, n)
+# for equal lengths or lists of 1-D arrays. Returns (arcs, hues) shaped (paths, len(ARCS)) and
+# (paths, sectors).
+def dwell_times(t, u, v, sectors=HUE_SECTORS):
+    if isinstance(t, (list, tuple)):
+        ts, us, vs = ([np.asarray(a, dtype=float).ravel() for a in x] for x in (t, u, v))
+    else:
+        ts, us, vs = (list(np.atleast_2d(np.asarray(x, dtype=float))) for x in (t, u, v))
+    count = len(ts)
+    path = np.repeat(np.arange(count), [len(a) for a in ts])
+    weights = np.concatenate([sample_times(a) for a in ts]) if count else np.empty(0)
+    u, v = (np.concatenate(x) if count else np.empty(0) for x in (us, vs))
+    with span('dwell times', paths=count, samples=len(path)):
+        arcs = np.bincount(path * len(ARCS) + arc_index(v), weights, minlength=count * len(ARCS))
+        hues = np.bincount(path * sectors + hue_index(u, sectors), weights, minlength=count * sectors)
+    return arcs.reshape(count, len(ARCS)), hues.reshape(count, sectors)
+
+def _spec_key(path, sectors):
+    path = dict(DEFAULT_PATH, **path)
+    return tuple(path[k] for k in _KEY) + (sectors,)
+
+# Dwell-time histograms of journeys given as path specs (see spec.DEFAULT_PATH), as
+# (arcs, hues) like dwell_times. Only specs not in the cache are sampled, in batches of `CHUNK`.
+def journey_dwell(specs, sectors=HUE_SECTORS):
+    started = log.start()
+    keys = [_spec_key(path, sectors) for path in specs]
+    # Gather this call's results here, as the cache may evict some of them before the end
+    found = {}
+    for key in keys:
+        if key not in found and key in _cache:
+            _cache.move_to_end(key)
+            found[key] = _cache[key]
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    for start in range(0, len(missing), CHUNK):
+        batch = missing[start:start + CHUNK]
+        angles = [paths.journey_angles(*key[:-1]) for key in batch]
+        arcs, hues = dwell_times(*([a[i] for a in angles] for i in range(3)), sectors=sectors)
+        for key, entry in zip(batch, zip(arcs, hues)):
+            found[key] = _cache[key] = entry
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    arcs = np.array([found[key][0] for key in keys]).reshape(len(keys), len(ARCS))
+    hues = np.array([found[key][1] for key in keys]).reshape(len(keys), sectors)
+    log.summary(logger, 'journey_dwell', started, paths=len(keys), computed=len(missing))
+    return arcs, hues
+
+def clear_cache():
+    _cache.clear()
+
+# Dwell times of journeys given as rows of AXES values (like bake.lattice_points), as a table:
+# a dict of AXES, ARCS and hue_columns(sectors) arrays
+def dwell_table(params, samples_per_cycle=DEFAULT_PATH['samples_per_cycle'], sectors=HUE_SECTORS):
+    params = np.asarray(params, dtype=float).reshape(-1, len(AXES))
+    specs = [dict(zip(AXES, row), samples_per_cycle=samples_per_cycle) for row in params.tolist()]
+    arcs, hues = journey_dwell(specs, sectors)
+    table = {axis: params[:, i] for i, axis in enumerate(AXES)}
+    table.update(zip(ARCS, arcs.T))
+    table.update(zip(hue_columns(sectors), hues.T))
+    return table
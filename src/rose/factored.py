@@ -0,0 +1,112 @@
+import functools
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.color import alchemical_rgb, hls_to_rgb
+from rose.trace import count, span
+
+logger = logging.getLogger(__name__)
+
+# The horn torus in factored form.
+#
+# A surface of revolution is one v-profile rotated about the axis: on the regular grid
+# X = ring(v) cos(u), Y = ring(v) sin(u) and Z = z(v), and the separable color models
+# depend on u or v alone. A FactoredHornTorus keeps only those O(resolution) factors and
+# builds each full (resolution, resolution) array the first time it is asked for, so
+# consumers that only need Z or the colors never pay for X and Y, and consumers that
+# understand the factors never build the grid at all. Values are bit-identical to
+# generate_3d_horn_torus.
+
+# RGB factors of the separable color models: (rgb along u or None, rgb along v or None)
+COLOR_FACTORS = {
+    'hls': lambda u, v, saturation: (hls_to_rgb(u / (2 * np.pi), 0.5, saturation), None),
+    'alchemical': lambda u, v, saturation: (None, alchemical_rgb(v)),
+}
+
+# The full arrays, in the order generate_3d_horn_torus returns them
+ARRAYS = ('X', 'Y', 'Z', 'rgba')
+
+class FactoredHornTorus:
+    def __init__(self, resolution=100, radius=1, saturation=1.0, color_model='hls'):
+        if color_model not in COLOR_FACTORS:
+            raise ValueError(f"Color model {color_model!r} is not separable, expected one of {sorted(COLOR_FACTORS)}")
+        self.resolution = resolution
+        self.radius = radius
+        self.saturation = saturation
+        self.color_model = color_model
+        self.shape = (resolution, resolution)
+        # The u-rotation
+        self.u = np.linspace(0, 2 * np.pi, resolution)
+        self.cos_u = np.cos(self.u)
+        self.sin_u = np.sin(self.u)
+        # The v-profile
+        self.v = np.linspace(0, 2 * np.pi, resolution)
+        self.ring = radius + radius * np.cos(self.v + np.pi)
+        self.z = radius * np.sin(self.v + np.pi)
+        self.alpha = 1 - self.v / (2 * np.pi)
+        self.rgb_u, self.rgb_v = COLOR_FACTORS[color_model](self.u, self.v, saturation)
+
+    @property
+    def factor_nbytes(self):
+        factors = (self.u, self.cos_u, self.sin_u, self.v, self.ring, self.z, self.alpha, self.rgb_u, self.rgb_v)
+        return sum(f.nbytes for f in factors if f is not None)
+
+    # Full arrays, built on first access
+    @functools.cached_property
+    def X(self):
+        return self._build('X', lambda: np.multiply.outer(self.ring, self.cos_u))
+
+    @functools.cached_property
+    def Y(self):
+        return self._build('Y', lambda: np.multiply.outer(self.ring, self.sin_u))
+
+    @functools.cached_property
+    def Z(self):
+        return self._build('Z', lambda: np.repeat(self.z[:, None], self.resolution, axis=1))
+
+    @functools.cached_property
+    def rgba(self):
+        return self._build('rgba', lambda: self.fill_rgba(np.empty(self.shape + (4,))))
+
+    def _build(self, name, build):
+        with span('materialize', array=name, resolution=self.resolution):
+            array = build()
+        count('materialized bytes', array.nbytes)
+        return array
+
+    def fill_rgba(self, out):
+        out[..., :3] = self.rgb_u if self.rgb_u is not None else self.rgb_v[:, None]
+        out[..., 3] = self.alpha[:, None]
+        return out
+
+    # Write all four arrays into caller-provided buffers, e.g. kernels.horn_torus_buffers
+    def fill(self, out):
+        X, Y, Z, rgba = out
+        np.multiply(self.ring[:, None], self.cos_u, out=X)
+        np.multiply(self.ring[:, None], self.sin_u, out=Y)
+        Z[...] = self.z[:, None]
+        self.fill_rgba(rgba)
+        return out
+
+    # Indexes, slices and unpacks like the tuple from generate_3d_horn_torus: X, Y, Z, rgba = layer.
+    # Only the arrays asked for are built.
+    def __getitem__(self, index):
+        names = ARRAYS[index]
+        return tuple(getattr(self, name) for name in names) if isinstance(index, slice) else getattr(self, names)
+
+    def __len__(self):
+        return len(ARRAYS)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in ARRAYS)
+
+# Factored layer for a separable color model; O(resolution) time and memory until arrays are used
+def factored_horn_torus(resolution=100, radius=1, saturation=1.0, color_model='hls'):
+    started = log.start()
+    with span('factored_horn_torus', resolution=resolution, radius=radius):
+        layer = FactoredHornTorus(resolution, radius, saturation, color_model)
+    log.summary(logger, 'factored_horn_torus', started, resolution=resolution, radius=radius,
+                factor_bytes=layer.factor_nbytes)
+    return layer
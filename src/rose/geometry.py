@@ -0,0 +1,48 @@
+import logging
+
+import numpy as np
+
+from rose import kernels, log
+from rose.color import COLOR_MODELS
+from rose.trace import count, span
+
+logger = logging.getLogger(__name__)
+
+# The (u, v) grid of a horn torus; rows follow v, columns follow u
+def horn_torus_grid(resolution):
+    u = np.linspace(0, 2 * np.pi, resolution)
+    v = np.linspace(0, 2 * np.pi, resolution)
+    return np.meshgrid(u, v)
+
+# Point on the horn torus for developmental angle u and alchemical angle v.
+# A phase shift makes v = 0 correspond to the center of the torus (singularity).
+def torus_point(u, v, radius=1):
+    ring = radius + radius * np.cos(v + np.pi)
+    return ring * np.cos(u), ring * np.sin(u), radius * np.sin(v + np.pi)
+
+# Function to generate 3D horn torus data. Color models with a fused kernel ('hls') are
+# generated in one pass without meshgrids; `backend` picks the kernel (see rose.kernels).
+# `out` takes reusable (X, Y, Z, RGBA) buffers, e.g. from kernels.horn_torus_buffers, which
+# are filled in place and returned; see kernels.Workspace for loops that generate every frame.
+def generate_3d_horn_torus(resolution=100, radius=1, saturation=1.0, color_model='hls', backend=None, out=None):
+    started = log.start()
+    with span('generate_3d_horn_torus', resolution=resolution, radius=radius):
+        if color_model in kernels.FUSED_MODELS:
+            with span('fused', backend=backend or kernels.DEFAULT_BACKEND):
+                X, Y, Z, rgba = kernels.fill_horn_torus(
+                    resolution, radius, saturation, out or kernels.horn_torus_buffers(resolution), backend)
+        else:
+            with span('meshgrid'):
+                U, V = horn_torus_grid(resolution)
+            with span('trig'):
+                X, Y, Z = torus_point(U, V, radius)
+            with span('color', model=color_model):
+                rgba = COLOR_MODELS[color_model](U, V, saturation)
+            if out is not None:
+                for target, array in zip(out, (X, Y, Z, rgba)):
+                    np.copyto(target, array)
+                X, Y, Z, rgba = out
+    count('generated points', X.size)
+    count('generated bytes', X.nbytes + Y.nbytes + Z.nbytes + rgba.nbytes)
+    log.summary(logger, 'generate_3d_horn_torus', started, resolution=resolution, radius=radius, points=X.size)
+    return X, Y, Z, rgba
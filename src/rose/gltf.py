@@ -0,0 +1,151 @@
+import json
+import logging
+import struct
+
+import numpy as np
+
+from rose import log
+from rose.bake import png_bytes
+from rose.color import COLOR_MODELS
+from rose.factored import FactoredHornTorus
+from rose.geometry import horn_torus_grid
+from rose.trace import span
+from rose.wire import quantize
+
+logger = logging.getLogger(__name__)
+
+# Binary glTF (GLB) export of nested torus layers, instanced.
+#
+# Nested layers differ only by a uniform scale (the radius) and their colors, so the file
+# holds one unit torus: positions, texture coordinates and triangle indices, stored once.
+# Each layer is a node scaling that geometry by its radius. Its colors come from an
+# unlit material whose texture holds the layer's RGBA at the vertex grid: texel centre
+# (j, i) is vertex (u_j, v_i), so the texture reproduces the vertex colors of
+# generate_3d_horn_torus. Geometry is therefore stored once instead of once per layer.
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+# glTF enums
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_LINEAR = 9729
+_CLAMP_TO_EDGE = 33071
+
+# Triangles of the (v, u) vertex grid, two per quad, as uint32 indices
+def grid_triangles(resolution):
+    rows, cols = np.meshgrid(np.arange(resolution - 1), np.arange(resolution - 1), indexing='ij')
+    a = (rows * resolution + cols).ravel()
+    b, c, d = a + 1, a + resolution, a + resolution + 1
+    return np.stack([a, c, b, b, c, d], axis=-1).astype('<u4').ravel()
+
+# Geometry of the unit torus shared by every layer: positions, texture coordinates, indices
+def unit_torus_geometry(resolution):
+    layer = FactoredHornTorus(resolution, radius=1)
+    positions = np.stack([layer.X, layer.Y, layer.Z], axis=-1).reshape(-1, 3).astype('<f4')
+    texel = (np.arange(resolution) + 0.5) / resolution
+    s, t = np.meshgrid(texel, texel)
+    texcoords = np.stack([s, t], axis=-1).reshape(-1, 2).astype('<f4')
+    return positions, texcoords, grid_triangles(resolution)
+
+# One layer's colors as a PNG texture at the vertex grid
+def layer_texture(resolution, saturation, color='hls'):
+    U, V = horn_torus_grid(resolution)
+    return png_bytes(quantize(COLOR_MODELS[color](U, V, saturation)))
+
+class _BinaryBuffer:
+    def __init__(self):
+        self.chunks = []
+        self.views = []
+        self.size = 0
+
+    # Append bytes as a new buffer view, 4-byte aligned as glTF requires
+    def view(self, data, target=None):
+        padding = -self.size % 4
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.size += padding
+        view = {'buffer': 0, 'byteOffset': self.size, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        self.chunks.append(data)
+        self.size += len(data)
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def tobytes(self):
+        data = b''.join(self.chunks)
+        return data + b'\0' * (-len(data) % 4)
+
+# GLB document for layers given as {radius, saturation}, as in a normalized render spec
+def encode_glb(resolution, layers, color='hls'):
+    started = log.start()
+    binary = _BinaryBuffer()
+    with span('glb geometry', resolution=resolution):
+        positions, texcoords, indices = unit_torus_geometry(resolution)
+        accessors = [
+            {'bufferView': binary.view(positions.tobytes(), _ARRAY_BUFFER), 'componentType': _FLOAT,
+             'count': len(positions), 'type': 'VEC3',
+             'min': positions.min(axis=0).tolist(), 'max': positions.max(axis=0).tolist()},
+            {'bufferView': binary.view(texcoords.tobytes(), _ARRAY_BUFFER), 'componentType': _FLOAT,
+             'count': len(texcoords), 'type': 'VEC2'},
+            {'bufferView': binary.view(indices.tobytes(), _ELEMENT_ARRAY_BUFFER), 'componentType': _UNSIGNED_INT,
+             'count': len(indices), 'type': 'SCALAR'},
+        ]
+    images, materials, meshes, nodes = [], [], [], []
+    with span('glb textures', layers=len(layers)):
+        for i, layer in enumerate(layers):
+            texture = layer_texture(resolution, layer['saturation'], color)
+            images.append({'bufferView': binary.view(texture), 'mimeType': 'image/png'})
+            materials.append({
+                'pbrMetallicRoughness': {'baseColorTexture': {'index': i}, 'metallicFactor': 0.0},
+                'alphaMode': 'BLEND',
+                'doubleSided': True,
+                'extensions': {'KHR_materials_unlit': {}},
+            })
+            meshes.append({'primitives': [{'attributes': {'POSITION': 0, 'TEXCOORD_0': 1}, 'indices': 2,
+                                           'material': i}]})
+            radius = float(layer['radius'])
+            nodes.append({'name': f'layer {i}', 'mesh': i, 'scale': [radius, radius, radius]})
+
+    body = binary.tobytes()
+    document = {
+        'asset': {'version': '2.0', 'generator': 'rose'},
+        'extensionsUsed': ['KHR_materials_unlit'],
+        'scene': 0,
+        'scenes': [{'nodes': list(range(len(nodes)))}],
+        'nodes': nodes,
+        'meshes': meshes,
+        'materials': materials,
+        'textures': [{'sampler': 0, 'source': i} for i in range(len(images))],
+        'samplers': [{'magFilter': _LINEAR, 'minFilter': _LINEAR,
+                      'wrapS': _CLAMP_TO_EDGE, 'wrapT': _CLAMP_TO_EDGE}],
+        'images': images,
+        'accessors': accessors,
+        'bufferViews': binary.views,
+        'buffers': [{'byteLength': len(body)}],
+    }
+    header = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+    glb = b''.join([
+        struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, 12 + 8 + len(header) + 8 + len(body)),
+        struct.pack('<II', len(header), _CHUNK_JSON), header,
+        struct.pack('<II', len(body), _CHUNK_BIN), body,
+    ])
+    log.summary(logger, 'encode_glb', started, resolution=resolution, layers=len(layers), bytes=len(glb))
+    return glb
+
+# Parse a GLB into its JSON document and binary chunk
+def decode_glb(data):
+    magic, version, length = struct.unpack_from('<4sII', data)
+    if magic != GLB_MAGIC or version != GLB_VERSION:
+        raise ValueError("Not a glTF 2.0 binary")
+    json_length, _ = struct.unpack_from('<II', data, 12)
+    document = json.loads(data[20:20 + json_length])
+    bin_length, _ = struct.unpack_from('<II', data, 20 + json_length)
+    start = 28 + json_length
+    return document, data[start:start + bin_length]
@@ -0,0 +1,224 @@
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import time
+import uuid
+
+from rose.cache import default_cache, spec_key
+from rose.paths import journey_points
+from rose.spec import normalize_spec
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Renders at or above this resolution, or this many points in total, go to the heavy lane
+HEAVY_RESOLUTION = 1000
+HEAVY_POINTS = 2000000
+
+# Jobs take the same render specs as the command line (see rose.spec) and produce the Plotly
+# JSON of the spec's figure. Names and outputs do not change the figure, so they are left out
+# of the key that duplicate submissions and the cache share.
+def render_key(spec):
+    return spec_key({name: value for name, value in spec.items() if name not in ('name', 'outputs')})
+
+# Poster-size renders must never hold up small interactive ones
+def spec_lane(spec):
+    points = spec['resolution'] ** 2 * len(spec['layers'])
+    if spec['resolution'] >= HEAVY_RESOLUTION or points >= HEAVY_POINTS:
+        return 'heavy'
+    return 'interactive'
+
+# Worker-side unit of work: one torus layer serialized as a Plotly trace.
+# Plotly is imported here, in the worker, so the queue itself stays light.
+def render_layer(spec, index):
+    from rose import render
+    layer = spec['layers'][index]
+    trace = render.layer_trace(*render.sample_layer(spec['resolution'], layer['radius'], layer['saturation'],
+                                                    spec['color'], spec['sampling']))
+    with span('serialize', layer=index):
+        return trace.to_json()
+
+# Stitch the per-layer traces and the journeys into a complete figure without re-parsing them
+def assemble_figure(spec, parts):
+    from rose import render
+    for path in spec['paths']:
+        points = journey_points(path['radius'], path['u_start'], path['u_end'], path['length'],
+                                path['samples_per_cycle'], path['spacing'])
+        parts = parts + [render.path_trace(points, color=path['color']).to_json()]
+    layout = render.horn_torus_layout().to_json()
+    return ('{"data":[' + ','.join(parts) + '],"layout":' + layout + '}').encode('utf-8')
+
+class RenderJob:
+    def __init__(self, spec, key, lane, priority, timeout):
+        self.id = uuid.uuid4().hex
+        self.spec = spec
+        self.key = key
+        self.lane = lane
+        self.priority = priority
+        self.timeout = timeout
+        self.state = 'queued'
+        self.layers_done = 0
+        self.error = None
+        self.result = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.task = None
+        self.done = asyncio.Event()
+
+    @property
+    def progress(self):
+        if self.state == 'done':
+            return 1.0
+        return self.layers_done / (len(self.spec['layers']) + 1)
+
+    def finish(self, state, result=None, error=None):
+        self.state = state
+        self.result = result
+        self.error = error
+        self.finished = time.monotonic()
+        self.done.set()
+
+    def status(self):
+        return {
+            'id': self.id,
+            'state': self.state,
+            'lane': self.lane,
+            'priority': self.priority,
+            'progress': self.progress,
+            'error': self.error,
+            'elapsed': (self.finished or time.monotonic()) - (self.started or self.submitted),
+        }
+
+# Asyncio front end for renders executed in per-lane process pools.
+# Each lane has its own pool and priority queue, so interactive work never waits on heavy work.
+class RenderJobQueue:
+    def __init__(self, cache=None, interactive_workers=1, heavy_workers=1, default_timeout=None):
+        self.cache = default_cache if cache is None else cache
+        self.workers = {'interactive': interactive_workers, 'heavy': heavy_workers}
+        self.default_timeout = default_timeout
+        self._jobs = {}
+        self._active = {}  # spec key -> job, so duplicate submissions share one render
+        self._seq = itertools.count()
+        self._queues = {}
+        self._executors = {}
+        self._runners = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        for lane, workers in self.workers.items():
+            self._queues[lane] = asyncio.PriorityQueue()
+            self._executors[lane] = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            for _ in range(workers):
+                self._runners.append(asyncio.ensure_future(self._run_lane(lane)))
+        logger.info("Render job queue started with %s workers.", self.workers)
+
+    async def close(self):
+        for job in list(self._active.values()):
+            self.cancel(job.id)
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+        for executor in self._executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._executors = {}
+
+    # Queue a render of a spec (a dict as in a spec file, or one from rose.spec.load_specs) and
+    # return its job id; higher priority runs first within a lane. Bad specs raise SpecError.
+    def submit(self, spec, priority=0, timeout=None):
+        if not self._queues:
+            raise RuntimeError("Render job queue not started; use start() or async with.")
+        spec = normalize_spec(spec or {})
+        key = render_key(spec)
+        active = self._active.get(key)
+        if active is not None:
+            return active.id
+
+        job = RenderJob(spec, key, spec_lane(spec), priority,
+                        self.default_timeout if timeout is None else timeout)
+        self._jobs[job.id] = job
+        cached = self.cache.get(key)
+        if cached is not None:
+            job.layers_done = len(spec['layers'])
+            job.finish('done', result=cached)
+            return job.id
+
+        self._active[key] = job
+        self._queues[job.lane].put_nowait((-priority, next(self._seq), job))
+        logger.info("Queued render job %s on the %s lane: %s", job.id, job.lane, spec)
+        return job.id
+
+    def status(self, job_id):
+        return self._jobs[job_id].status()
+
+    # Cancel a queued or running job; layers already in a worker finish but are discarded
+    def cancel(self, job_id):
+        job = self._jobs[job_id]
+        if job.done.is_set():
+            return False
+        self._active.pop(job.key, None)
+        if job.task is not None:
+            job.task.cancel()
+        job.finish('cancelled')
+        return True
+
+    async def result(self, job_id):
+        job = self._jobs[job_id]
+        await job.done.wait()
+        if job.state != 'done':
+            raise RuntimeError(f"Render job {job_id} {job.state}: {job.error}")
+        return job.result
+
+    def forget(self, job_id):
+        job = self._jobs.pop(job_id)
+        if not job.done.is_set():
+            self.cancel(job_id)
+
+    async def _run_lane(self, lane):
+        queue = self._queues[lane]
+        while True:
+            _, _, job = await queue.get()
+            if job.state != 'queued':
+                continue  # cancelled while waiting
+
+            job.state = 'running'
+            job.started = time.monotonic()
+            job.task = asyncio.ensure_future(self._render(job, self._executors[lane]))
+            try:
+                data = await asyncio.wait_for(job.task, job.timeout)
+            except asyncio.CancelledError:
+                # Only the job was cancelled if this runner itself is not being cancelled (by close)
+                if job.state != 'cancelled' or asyncio.current_task().cancelling():
+                    raise
+                logger.info("Render job %s cancelled.", job.id)
+                continue
+            except asyncio.TimeoutError:
+                logger.warning("Render job %s timed out after %ss.", job.id, job.timeout)
+                job.finish('timeout', error=f"exceeded {job.timeout}s")
+            except Exception as exc:
+                logger.exception("Render job %s failed.", job.id)
+                job.finish('failed', error=repr(exc))
+            else:
+                self.cache.put(job.key, data)
+                job.finish('done', result=data)
+                logger.info("Render job %s finished in %.2fs.", job.id, job.finished - job.started)
+            finally:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    # Render layer by layer so progress, cancellation and timeouts take effect between layers
+    async def _render(self, job, executor):
+        loop = asyncio.get_running_loop()
+        parts = []
+        for layer in range(len(job.spec['layers'])):
+            parts.append(await loop.run_in_executor(executor, render_layer, job.spec, layer))
+            job.layers_done = layer + 1
+        return assemble_figure(job.spec, parts)
@@ -0,0 +1,202 @@
+import functools
+import importlib.util
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.trace import count, span
+
+logger = logging.getLogger(__name__)
+
+# Fused generate-and-color kernels for the 'hls' horn torus.
+#
+# Every per-point quantity of the horn torus is separable: position is ring(v) times cos/sin(u),
+# height and opacity depend on v alone, and the HLS color on u alone. The kernels compute those
+# per row and per column and write each point once, straight into caller-provided buffers,
+# instead of materializing meshgrids and a temporary per operation. The 'numpy' backend is
+# bit-identical to generate_3d_horn_torus; 'numba' compiles the same loops in parallel over
+# rows and may differ from it in the last bit of the trig functions. Numba is optional and
+# only imported (and the kernel compiled, then cached on disk) the first time it is used.
+
+BACKENDS = ('numba', 'numpy') if importlib.util.find_spec('numba') is not None else ('numpy',)
+DEFAULT_BACKEND = BACKENDS[0]
+
+# Output buffers for one layer: X, Y, Z of shape (resolution, resolution) and RGBA (..., 4)
+def horn_torus_buffers(resolution, dtype=np.float64):
+    shape = (resolution, resolution)
+    return np.empty(shape, dtype), np.empty(shape, dtype), np.empty(shape, dtype), np.empty(shape + (4,), dtype)
+
+# Per-row and per-column working arrays of the kernels, reused between calls by a Workspace
+class Scratch:
+    __slots__ = ('grid', 'rows', 'cols', 'mask')
+
+    def __init__(self, resolution):
+        self.grid = np.linspace(0, 2 * np.pi, resolution)
+        self.rows = np.empty((4, resolution))   # phase, ring, z, alpha
+        self.cols = np.empty((7, resolution))   # cos u, sin u, r, g, b, hue, channel term
+        self.mask = np.empty(resolution, dtype=bool)
+
+# One channel of hls_to_rgb at lightness 0.5, computed with out= ufuncs into `out`. Same
+# operations in the same order as colorsys's _v, so the result is bit-identical.
+def _channel_into(hue, shift, m1, m2, out, h, term, mask):
+    np.add(hue, shift, out=h)
+    np.remainder(h, 1.0, out=h)
+    out.fill(m1)
+    np.subtract(2 / 3, h, out=term)
+    np.multiply(term, m2 - m1, out=term)
+    np.multiply(term, 6.0, out=term)
+    np.add(term, m1, out=term)
+    np.copyto(out, term, where=np.less(h, 2 / 3, out=mask))
+    np.copyto(out, m2, where=np.less(h, 0.5, out=mask))
+    np.multiply(h, m2 - m1, out=term)
+    np.multiply(term, 6.0, out=term)
+    np.add(term, m1, out=term)
+    np.copyto(out, term, where=np.less(h, 1 / 6, out=mask))
+
+def _fill_numpy(u, v, radius, saturation, X, Y, Z, rgba, scratch):
+    phase, ring, z, alpha = scratch.rows
+    cos_u, sin_u, red, green, blue, hue, term = scratch.cols
+    np.add(v, np.pi, out=phase)
+    np.cos(phase, out=ring)
+    np.multiply(ring, radius, out=ring)
+    np.add(ring, radius, out=ring)
+    np.sin(phase, out=z)
+    np.multiply(z, radius, out=z)
+    np.divide(v, 2 * np.pi, out=alpha)
+    np.subtract(1, alpha, out=alpha)
+    np.cos(u, out=cos_u)
+    np.sin(u, out=sin_u)
+
+    m2 = 0.5 * (1.0 + saturation)  # lightness 0.5
+    m1 = 1.0 - m2
+    np.divide(u, 2 * np.pi, out=hue)
+    h = scratch.rows[0]  # phase is no longer needed
+    for channel, shift in ((red, 1 / 3), (green, 0.0), (blue, -1 / 3)):
+        _channel_into(hue, shift, m1, m2, channel, h, term, scratch.mask)
+
+    np.multiply(ring[:, None], cos_u, out=X)
+    np.multiply(ring[:, None], sin_u, out=Y)
+    Z[...] = z[:, None]
+    rgba[..., 0] = red
+    rgba[..., 1] = green
+    rgba[..., 2] = blue
+    rgba[..., 3] = alpha[:, None]
+
+# colorsys's _v, for one channel of a hue
+def _channel(m1, m2, hue):
+    hue = hue % 1.0
+    if hue < 1 / 6:
+        return m1 + (m2 - m1) * hue * 6.0
+    if hue < 0.5:
+        return m2
+    if hue < 2 / 3:
+        return m1 + (m2 - m1) * (2 / 3 - hue) * 6.0
+    return m1
+
+# Reference loops for the numba backend, parallel over rows
+def _fill_loops(u, v, radius, saturation, X, Y, Z, rgba, cols):
+    n_u = u.shape[0]
+    cos_u = cols[0]
+    sin_u = cols[1]
+    rgb = cols[2:5].T
+    m2 = 0.5 * (1.0 + saturation)  # lightness 0.5
+    m1 = 1.0 - m2
+    for j in range(n_u):
+        cos_u[j] = np.cos(u[j])
+        sin_u[j] = np.sin(u[j])
+        hue = u[j] / (2 * np.pi)
+        rgb[j, 0] = _channel(m1, m2, hue + 1 / 3)
+        rgb[j, 1] = _channel(m1, m2, hue)
+        rgb[j, 2] = _channel(m1, m2, hue - 1 / 3)
+    for i in prange(v.shape[0]):
+        phase = v[i] + np.pi
+        ring = radius + radius * np.cos(phase)
+        z = radius * np.sin(phase)
+        alpha = 1 - v[i] / (2 * np.pi)
+        for j in range(n_u):
+            X[i, j] = ring * cos_u[j]
+            Y[i, j] = ring * sin_u[j]
+            Z[i, j] = z
+            rgba[i, j, 0] = rgb[j, 0]
+            rgba[i, j, 1] = rgb[j, 1]
+            rgba[i, j, 2] = rgb[j, 2]
+            rgba[i, j, 3] = alpha
+
+prange = range  # numba.prange once compiled
+
+@functools.lru_cache(maxsize=None)
+def _compiled_loops():
+    global _channel, prange
+    import numba
+    prange = numba.prange
+    _channel = numba.njit(cache=True, inline='always')(_channel)
+    return numba.njit(cache=True, parallel=True)(_fill_loops)
+
+def _fill(backend):
+    if backend == 'numpy':
+        return _fill_numpy
+    if backend == 'numba' and 'numba' in BACKENDS:
+        return _compiled_loops()
+    raise ValueError(f"Unknown or unavailable backend {backend!r}, expected one of {list(BACKENDS)}")
+
+# Color models the kernels compute themselves
+FUSED_MODELS = ('hls',)
+
+# Fill `out` (X, Y, Z, RGBA buffers) with the layer at `resolution`, without logging.
+# With a Scratch from an earlier call nothing is allocated.
+def fill_horn_torus(resolution, radius, saturation, out, backend=None, scratch=None):
+    backend = backend or DEFAULT_BACKEND
+    fill = _fill(backend)
+    X, Y, Z, rgba = out
+    if X.shape != (resolution, resolution) or rgba.shape != (resolution, resolution, 4):
+        raise ValueError(f"Output buffers do not match resolution {resolution}")
+    scratch = scratch or Scratch(resolution)
+    grid = scratch.grid
+    if backend == 'numpy':
+        fill(grid, grid, float(radius), float(saturation), X, Y, Z, rgba, scratch)
+    else:
+        fill(grid, grid, float(radius), float(saturation), X, Y, Z, rgba, scratch.cols)
+    return out
+
+# Horn torus positions and 'hls' colors in one pass, written into `out` (from
+# horn_torus_buffers) when given. Same values and layout as generate_3d_horn_torus.
+def fused_horn_torus(resolution=100, radius=1, saturation=1.0, out=None, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    started = log.start()
+    with span('fused_horn_torus', resolution=resolution, radius=radius, backend=backend):
+        out = fill_horn_torus(resolution, radius, saturation,
+                              out if out is not None else horn_torus_buffers(resolution), backend)
+    count('generated points', resolution * resolution)
+    log.summary(logger, 'fused_horn_torus', started, resolution=resolution, backend=backend,
+                points=resolution * resolution)
+    return out
+
+# Reusable output buffers and scratch for generating up to `layers` layers at `resolution`,
+# for animation and server loops: after construction, generate() allocates nothing.
+#
+#   workspace = Workspace(200, layers=20)
+#   for frame in frames:
+#       X, Y, Z, rgba = workspace.generate(0, radius, saturation)
+#
+# The arrays returned are overwritten by the next generate() of the same layer.
+class Workspace:
+    def __init__(self, resolution, layers=1, backend=None):
+        self.resolution = resolution
+        self.backend = backend or DEFAULT_BACKEND
+        self.buffers = [horn_torus_buffers(resolution) for _ in range(layers)]
+        self.scratch = Scratch(resolution)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for layer in self.buffers for a in layer)
+
+    def generate(self, layer, radius=1, saturation=1.0):
+        with span('workspace generate', layer=layer):
+            return fill_horn_torus(self.resolution, radius, saturation, self.buffers[layer],
+                                   self.backend, self.scratch)
+
+    # The nested layers of render_horn_torus_plotly: radius and saturation (i + 1) / layers
+    def nested(self):
+        layers = len(self.buffers)
+        return [self.generate(i, (i + 1) / layers, (i + 1) / layers) for i in range(layers)]
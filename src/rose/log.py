@@ -0,0 +1,65 @@
+import json
+import logging
+import sys
+import time
+
+# Logging conventions for the package.
+#
+# Library code never formats messages itself and never logs inside vectorized kernels or
+# per-element loops. Each stage logs one summary when it finishes, through summary(), which
+# checks the level before computing anything, so a disabled level costs one comparison.
+# Only applications (the rose CLI) call configure_logging().
+
+# Fields rendered only when a handler actually formats the record
+class _Fields:
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join(f'{k}={v}' for k, v in self.fields.items())
+
+# Start time for a later summary() call
+def start():
+    return time.perf_counter()
+
+# One line per finished stage, e.g. summary(logger, 'generate', t0, points=n)
+def summary(logger, stage, started, level=logging.DEBUG, **fields):
+    if not logger.isEnabledFor(level):
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.log(level, "%s done in %.2f ms %s", stage, elapsed_ms, _Fields(fields),
+               extra={'stage': stage, 'elapsed_ms': elapsed_ms, 'fields': fields})
+
+class StructuredFormatter(logging.Formatter):
+    # One JSON object per record, carrying the stage fields of summary() records
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'stage'):
+            entry['stage'] = record.stage
+            entry['elapsed_ms'] = round(record.elapsed_ms, 3)
+            entry.update(record.fields)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+# Application-side setup for the 'rose' logger only, leaving the root logger alone
+def configure_logging(level=logging.WARNING, fmt='text', stream=None):
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if fmt == 'json':
+        handler.setFormatter(StructuredFormatter())
+    else:
+        # Configure logging to use a similar font style
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
+    logger = logging.getLogger('rose')
+    for old in [h for h in logger.handlers if not isinstance(h, logging.NullHandler)]:
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
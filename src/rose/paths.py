@@ -0,0 +1,67 @@
+import numpy as np
+
+from rose.geometry import torus_point
+
+# Lissajous path on the torus: u(t) = omega_u * t + phase_u, v(t) = omega_v * t + phase_v
+def lissajous_angles(t, omega_u, omega_v, phase_u=0.0, phase_v=0.0):
+    return omega_u * t + phase_u, omega_v * t + phase_v
+
+# How samples are spread along a path: evenly in t, evenly in 3D arc length, or densest where
+# the curve bends most
+SPACINGS = ('time', 'arc', 'curvature')
+
+# Number of samples used for a journey of the given length
+def journey_samples(length, samples_per_cycle=200):
+    return max(2, int(round(length * samples_per_cycle)) + 1)
+
+# Cumulative 3D arc length along points of shape (n, 3), starting at 0
+def arc_length(points):
+    steps = np.linalg.norm(np.diff(points, axis=0), axis=-1)
+    return np.concatenate([[0.0], np.cumsum(steps)])
+
+# Curvature at each of points (n, 3) sampled at parameter values t, by finite differences
+def curvature(points, t):
+    d1 = np.gradient(points, t, axis=0)
+    d2 = np.gradient(d1, t, axis=0)
+    speed = np.maximum(np.linalg.norm(d1, axis=-1), 1e-12)
+    return np.linalg.norm(np.cross(d1, d2), axis=-1) / speed ** 3
+
+# Parameter values of `count` samples along a densely sampled curve (t, points), spaced evenly
+# in arc length, or for spacing='curvature' in the integral of sqrt(curvature) ds, which keeps
+# the chord error of each segment about equal. Half the mean of sqrt(curvature) is added to
+# it so that nearly straight stretches still get samples. Each target is found by inverting
+# the cumulative measure with np.interp.
+def reparametrize(t, points, count, spacing='arc'):
+    s = arc_length(points)
+    if spacing == 'arc':
+        measure = s
+    elif spacing == 'curvature':
+        density = np.sqrt(curvature(points, t))
+        density = 0.5 * (density[1:] + density[:-1])
+        ds = np.diff(s)
+        density += 0.5 * np.sum(density * ds) / max(s[-1], 1e-12)
+        measure = np.concatenate([[0.0], np.cumsum(density * ds)])
+    else:
+        raise ValueError(f"Unknown path spacing {spacing!r}, expected one of {SPACINGS}")
+    return np.interp(np.linspace(0, measure[-1], count), measure, t)
+
+# Heros Journey from the website's parameters: the path leaves the singularity at u_start,
+# makes `length` full trips around the alchemical circle and arrives back at the singularity at u_end.
+# With spacing 'arc' or 'curvature' the same number of samples is placed by reparametrize()
+# on a path sampled `oversample` times more densely; the shape does not depend on the radius.
+def journey_angles(u_start, u_end, length, samples_per_cycle=200, spacing='time', oversample=8):
+    count = journey_samples(length, samples_per_cycle)
+    omega_u = (u_end - u_start) / length
+    if spacing == 'time':
+        t = np.linspace(0, length, count)
+    else:
+        dense = np.linspace(0, length, (count - 1) * oversample + 1)
+        points = np.stack(torus_point(*lissajous_angles(dense, omega_u, 2 * np.pi, phase_u=u_start)), axis=-1)
+        t = reparametrize(dense, points, count, spacing)
+    u, v = lissajous_angles(t, omega_u, 2 * np.pi, phase_u=u_start)
+    return t, u, v
+
+# 3D points of a Heros Journey on a torus of the given Moon radius, shape (n, 3)
+def journey_points(radius, u_start, u_end, length, samples_per_cycle=200, spacing='time'):
+    _, u, v = journey_angles(u_start, u_end, length, samples_per_cycle, spacing)
+    return np.stack(torus_point(u, v, radius), axis=-1)
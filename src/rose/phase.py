@@ -0,0 +1,87 @@
+import logging
+from fractions import Fraction
+from math import gcd, lcm
+
+import numpy as np
+
+from rose import log
+from rose.paths import journey_samples
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Drift-free evaluation of long Lissajous paths, in chunks.
+#
+# u(t) = omega_u * t + phase_u in float64 loses a bit of the angle for every doubling of t, so
+# far along a long path the angles wander and a path that should close no longer quite does.
+# Here angles are kept in turns (fractions of a full circle) and reduced modulo 1. Rates and
+# phases are exact Fractions: a rate close to a simple ratio (see exact_rate) is taken as
+# that ratio, and any other float as the binary fraction it already is.
+#
+# Sample k of a path lies at t = k * step. Every BLOCK samples an anchor turn is computed
+# exactly with Fractions and rounded once; the samples of that block add j * (turns per
+# sample) to it in float64, for j < BLOCK. The error is therefore bounded however long the
+# path, and every value depends on k alone, so splitting the span into chunks of any size
+# gives bit-identical results. Chunks are generated one at a time in constant memory.
+
+BLOCK = 4096  # samples per exact anchor
+CHUNK = 1 << 16  # samples per chunk yielded by path_chunks
+MAX_DENOMINATOR = 1 << 16
+
+# A rate in turns per unit t as a Fraction: Fractions and integers as they are, floats within
+# `tolerance` of a ratio with denominator up to `max_denominator` as that ratio (so that
+# commensurate rates are exactly commensurate), and other floats exactly
+def exact_rate(value, max_denominator=MAX_DENOMINATOR, tolerance=1e-12):
+    if isinstance(value, (Fraction, int)):
+        return Fraction(value)
+    value = float(value)
+    ratio = Fraction(value).limit_denominator(max_denominator)
+    return ratio if abs(ratio - Fraction(value)) <= tolerance * max(1.0, abs(value)) else Fraction(value)
+
+# Smallest t > 0 at which a path with these rates (Fractions of turns per unit t) is back at its
+# start in both angles; 0 if it never moves
+def closure_time(rate_u, rate_v):
+    rate_u, rate_v = Fraction(rate_u), Fraction(rate_v)
+    numerator = gcd(rate_u.numerator, rate_v.numerator)
+    return Fraction(lcm(rate_u.denominator, rate_v.denominator), numerator) if numerator else Fraction(0)
+
+# Turns in [0, 1) of samples start .. start + count of an angle advancing `per_sample` turns
+# per sample from `phase` turns (both Fractions)
+def turns(per_sample, phase, start, count):
+    k = np.arange(start, start + count)
+    if count == 0:
+        return k.astype(float)
+    first, last = start // BLOCK, (start + count - 1) // BLOCK
+    anchors = np.array([float((phase + per_sample * (b * BLOCK)) % 1) for b in range(first, last + 1)])
+    result = anchors[k // BLOCK - first] + (k % BLOCK) * float(per_sample % 1)
+    result -= np.floor(result)
+    return result
+
+# Angles (radians in [0, 2 pi)) of samples start .. start + count of a path moving `rate`
+# turns per unit t from `phase` radians, sampled every `step` of t
+def angles(rate, phase, start, count, step):
+    return 2 * np.pi * turns(exact_rate(rate) * Fraction(step), Fraction(phase / (2 * np.pi)), start, count)
+
+# Chunks (t, u, v) of the path u = 2 pi (rate_u t) + phase_u, v = 2 pi (rate_v t) + phase_v at
+# t = k * step for k < count, with rates in turns per unit t and u, v reduced to [0, 2 pi)
+def path_chunks(rate_u, rate_v, count, step, phase_u=0.0, phase_v=0.0, chunk=CHUNK):
+    started = log.start()
+    step = Fraction(step)
+    with span('path chunks', samples=count, chunk=chunk):
+        for start in range(0, count, chunk):
+            n = min(chunk, count - start)
+            t = np.arange(start, start + n) * float(step)
+            yield t, angles(rate_u, phase_u, start, n, step), angles(rate_v, phase_v, start, n, step)
+    log.summary(logger, 'path_chunks', started, samples=count, chunk=chunk)
+
+# Heros Journey rates in turns per alchemical cycle: u moves (u_end - u_start) / 2 pi over
+# `length` cycles, v one turn per cycle
+def journey_rates(u_start, u_end, length):
+    return exact_rate((u_end - u_start) / (2 * np.pi)) / exact_rate(length), Fraction(1)
+
+# A Heros Journey (as paths.journey_angles with spacing 'time') in chunks, with u and v reduced
+# to [0, 2 pi); the last sample is the arrival at the singularity
+def journey_chunks(u_start, u_end, length, samples_per_cycle=200, chunk=CHUNK):
+    count = journey_samples(length, samples_per_cycle)
+    rate_u, rate_v = journey_rates(u_start, u_end, length)
+    return path_chunks(rate_u, rate_v, count, exact_rate(length) / (count - 1), phase_u=u_start, chunk=chunk)
@@ -0,0 +1,115 @@
+import logging
+
+import plotly.graph_objs as go
+import plotly.io as pio
+
+from rose import log
+from rose.geometry import generate_3d_horn_torus
+from rose.sampling import equal_area_horn_torus, grid_equivalent_count
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Function to build the Plotly trace for one nested torus layer. sampling='equal_area' replaces
+# the (u, v) grid, dense at the center and sparse on the rim, with an even point cloud that
+# matches the grid's rim spacing in half the points.
+def horn_torus_trace(resolution=100, layer=0, layers=2, sampling='grid'):
+    radius = (layer + 1) / layers
+    saturation = radius  # Increasing saturation for each layer
+    return layer_trace(*sample_layer(resolution, radius, saturation, sampling=sampling))
+
+# Function to generate one layer as X, Y, Z and RGBA arrays with the given sampling
+def sample_layer(resolution, radius, saturation, color_model='hls', sampling='grid'):
+    if sampling == 'grid':
+        return generate_3d_horn_torus(resolution, radius=radius, saturation=saturation, color_model=color_model)
+    if sampling == 'equal_area':
+        samples = equal_area_horn_torus(grid_equivalent_count(resolution), radius=radius,
+                                        saturation=saturation, color_model=color_model)
+        return (*samples.points.T, samples.colors)
+    raise ValueError(f"Unknown sampling {sampling!r}")
+
+# Function to build a Scatter3d trace from generated torus arrays
+def layer_trace(X, Y, Z, colors):
+    # Flatten the arrays for Plotly
+    x = X.ravel()
+    y = Y.ravel()
+    z = Z.ravel()
+    rgba_colors = colors.reshape(-1, 4)
+
+    # Convert RGB and alpha values to a format that Plotly accepts (hex format)
+    with span('color strings', points=len(rgba_colors)):
+        plotly_colors = [
+            f'rgba({int(r*255)}, {int(g*255)}, {int(b*255)}, {alpha})'
+            for r, g, b, alpha in rgba_colors
+        ]
+
+    # Create hover text with RGBA values
+    with span('hover text', points=len(rgba_colors)):
+        hover_text = [
+            f'R: {int(r*255)}, G: {int(g*255)}, B: {int(b*255)}, A: {alpha:.2f}'
+            for r, g, b, alpha in rgba_colors
+        ]
+
+    # Create a Scatter3d plot with Plotly for each torus layer
+    with span('scatter3d'):
+        return go.Scatter3d(
+            x=x,
+            y=y,
+            z=z,
+            mode='markers',
+            marker=dict(
+                size=5,
+                color=plotly_colors,  # Set color using RGBA values
+            ),
+            text=hover_text,  # Add hover text
+            hoverinfo='text'  # Display custom text on hover
+        )
+
+# Function to build a line trace for a journey along the torus, shape (n, 3)
+def path_trace(points, color='#000000', width=4):
+    return go.Scatter3d(
+        x=points[:, 0],
+        y=points[:, 1],
+        z=points[:, 2],
+        mode='lines',
+        line=dict(color=color, width=width),
+        hoverinfo='skip',
+    )
+
+# Function to build the shared scene layout
+def horn_torus_layout():
+    return go.Layout(
+        margin=dict(l=0, r=0, b=0, t=0),
+        scene=dict(
+            xaxis=dict(
+                visible=False,
+            ),
+            yaxis=dict(
+                visible=False,
+            ),
+            zaxis=dict(
+                visible=False,
+            ),
+            bgcolor='#eeeeee',  # Set background color to light grey
+        ),
+    )
+
+# Function to build a figure from prepared traces on the shared scene layout
+def build_figure(traces):
+    with span('figure', traces=len(traces)):
+        return go.Figure(data=traces, layout=horn_torus_layout())
+
+# Function to build the full figure of nested horn tori
+def build_horn_torus_figure(resolution=100, layers=2, sampling='grid'):
+    started = log.start()
+    figure = build_figure([horn_torus_trace(resolution, i, layers, sampling) for i in range(layers)])
+    log.summary(logger, 'build_horn_torus_figure', started, logging.INFO, resolution=resolution, layers=layers,
+                sampling=sampling)
+    return figure
+
+# Function to render the horn tori using Plotly
+def render_horn_torus_plotly(resolution=100, layers=2, sampling='grid'):
+    logger.info("Starting to render the 3D horn tori color space interactively with Plotly.")
+    fig = build_horn_torus_figure(resolution, layers, sampling)
+    with span('show'):
+        pio.show(fig, renderer='browser')  # Open in the default web browser
@@ -0,0 +1,216 @@
+import collections
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.color import COLOR_MODELS
+from rose.geometry import torus_point
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Irregular samples of the torus surface. `rings` holds the first index and point count of
+# each ring of constant v; `triangles` is None for a bare point cloud.
+SurfaceSamples = collections.namedtuple('SurfaceSamples', 'u v points colors rings triangles')
+
+# The horn torus is a surface of revolution, so every quantity the samplers need depends on v
+# alone. With phi = v + pi, the principal curvatures are 1/r along the meridian and
+# cos(phi) / (r (1 + cos(phi))) around the axis; the latter diverges at the singularity v = 0.
+
+# Distance of the v-circle from the axis of revolution
+def ring_radius(v, radius=1):
+    return radius * (1 - np.cos(v))
+
+# Surface area per unit u and v
+def area_element(v, radius=1):
+    return radius * ring_radius(v, radius)
+
+# Rings of constant v needed for a chord error of `tolerance` (world units; a screen-space
+# error in pixels times the world size of a pixel). Along the meridian the curvature is 1/r
+# everywhere, so rings are evenly spaced in v. Around the axis a chord of angle du on a ring
+# of radius rho deviates from the surface by rho |cos v| du^2 / 8 along the normal, which
+# sets the points per ring: few near the pinch, where rings shrink to the singularity, and
+# where the surface is flat around the axis (cos v = 0), most on the outer rim.
+# 'area' instead spaces points evenly in arc length in both directions.
+#
+# Since the meridian spacing is fixed, the saving over the regular grid at equal error is at
+# most the ratio of the largest to the mean points per ring, max / mean of sqrt(rho |cos v|),
+# about 2.1 for any budget: measured, 'curvature' matches the grid's error, in world units and
+# on screen (see screen_error), with about half the points.
+def _ring_layout(mode, tolerance, radius, aspect):
+    step = np.sqrt(8 * tolerance * radius)  # meridian spacing for the chord error
+    ring_v = np.linspace(0, 2 * np.pi, max(3, int(np.ceil(2 * np.pi * radius / step))) + 1)
+    rho = ring_radius(ring_v, radius)
+    if mode == 'area':
+        per_ring = 2 * np.pi * rho / step
+    else:
+        per_ring = 2 * np.pi * np.sqrt(rho * np.abs(np.cos(ring_v)) / (8 * tolerance))
+        # Bound the aspect ratio of triangles where the surface is flat around the axis
+        per_ring = np.maximum(per_ring, 2 * np.pi * rho / (aspect * step))
+    per_ring = np.maximum(3, np.ceil(per_ring)).astype(int)
+    per_ring[rho < 1e-12 * radius] = 1  # the singularity itself is a single point
+    return ring_v, per_ring
+
+# Tolerance whose layout uses about `budget` points; the count falls monotonically with it
+def _tolerance_for_budget(mode, budget, radius, aspect):
+    lo, hi = np.log(1e-12 * radius), np.log(10.0 * radius)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if _ring_layout(mode, np.exp(mid), radius, aspect)[1].sum() > budget:
+            lo = mid
+        else:
+            hi = mid
+    return np.exp(hi)
+
+# Triangles stitching two consecutive rings with possibly different point counts, by
+# walking both rings in order of angle (the "zipper" used for lofted surfaces)
+def _stitch(start_a, angles_a, start_b, angles_b):
+    n_a, n_b = len(angles_a), len(angles_b)
+    next_a = np.append(angles_a[1:], angles_a[0] + 2 * np.pi)
+    next_b = np.append(angles_b[1:], angles_b[0] + 2 * np.pi)
+    order = np.argsort(np.concatenate([next_a, next_b]), kind='stable')
+    step_a = order < n_a
+    ia = np.cumsum(step_a) - step_a
+    ib = np.cumsum(~step_a) - ~step_a
+    a, a_next = start_a + ia % n_a, start_a + (ia + 1) % n_a
+    b, b_next = start_b + ib % n_b, start_b + (ib + 1) % n_b
+    return np.where(step_a[:, None], np.stack([a, a_next, b], axis=1), np.stack([a, b_next, b], axis=1))
+
+# Sample the torus surface with about `budget` points distributed by `mode`:
+# 'curvature' (equal chord error), 'area' (equal surface density) or 'uniform' (the regular grid).
+# Pass `tolerance` instead of a budget to ask for a chord error and take whatever count it needs.
+# Returns SurfaceSamples; with mesh=True it includes triangles joining consecutive rings.
+def adaptive_horn_torus(budget=10000, radius=1, saturation=1.0, mode='curvature', mesh=True,
+                        color_model='hls', tolerance=None, aspect=4.0):
+    if mode not in ('curvature', 'area', 'uniform'):
+        raise ValueError(f"Unknown sampling mode {mode!r}")
+    started = log.start()
+    with span('adaptive sampling', mode=mode, budget=budget):
+        if mode == 'uniform':
+            # The regular (u, v) grid of generate_3d_horn_torus, for comparison
+            side = max(2, int(round(np.sqrt(budget))))
+            ring_v, per_ring = np.linspace(0, 2 * np.pi, side), np.full(side, side)
+        else:
+            if tolerance is None:
+                tolerance = _tolerance_for_budget(mode, budget, radius, aspect)
+            ring_v, per_ring = _ring_layout(mode, tolerance, radius, aspect)
+        starts = np.concatenate([[0], np.cumsum(per_ring)[:-1]])
+
+        # Stagger alternate rings by half a step so stitched triangles stay well shaped
+        ring_of_point = np.repeat(np.arange(len(per_ring)), per_ring)
+        j = np.arange(per_ring.sum()) - starts[ring_of_point]
+        stagger = 0.0 if mode == 'uniform' else 0.5 * (ring_of_point % 2)
+        step = 2 * np.pi / np.where(per_ring > 1, per_ring - (mode == 'uniform'), 1)
+        u = (j + stagger) * step[ring_of_point]
+        v = ring_v[ring_of_point]
+
+        points = np.stack(torus_point(u, v, radius), axis=-1)
+        colors = COLOR_MODELS[color_model](u, v, saturation)
+
+        triangles = None
+        if mesh:
+            with span('stitch', rings=len(per_ring)):
+                triangles = np.concatenate([
+                    _stitch(starts[i], u[starts[i]:starts[i] + per_ring[i]],
+                            starts[i + 1], u[starts[i + 1]:starts[i + 1] + per_ring[i + 1]])
+                    for i in range(len(per_ring) - 1)
+                ])
+    log.summary(logger, 'adaptive_horn_torus', started, mode=mode, budget=budget, points=len(u))
+    return SurfaceSamples(u, v, points, colors, np.stack([starts, per_ring], axis=1), triangles)
+
+# Unit surface normal: the horn torus's tube circle is centred on the unit circle of radius r
+def surface_normal(u, v):
+    phi = v + np.pi
+    return np.stack([np.cos(phi) * np.cos(u), np.cos(phi) * np.sin(u), np.sin(phi)], axis=-1)
+
+# Largest distance, along the surface normal, between a triangle's centroid and the surface at
+# its (u, v) centroid: the chord error a renderer actually shows, for comparing sampling modes
+def mesh_error(samples, radius=1):
+    tri = samples.triangles
+    u = samples.u[tri]
+    # Average u on the circle so triangles spanning the 0 / 2 pi seam stay correct
+    u_mid = np.arctan2(np.sin(u).sum(axis=1), np.cos(u).sum(axis=1))
+    v_mid = samples.v[tri].mean(axis=1)
+    surface = np.stack(torus_point(u_mid, v_mid, radius), axis=-1)
+    offset = samples.points[tri].mean(axis=1) - surface
+    return np.abs(np.einsum('ij,ij->i', offset, surface_normal(u_mid, v_mid))).max()
+
+# Largest error in pixels of a mesh seen from `eye` (times radius, looking at the origin, z up)
+# in an image `height` pixels tall: how far on screen each triangle's centroid lies off the
+# surface point it stands for, along the surface normal. mesh_error weighs all triangles alike; on screen, facets
+# seen face-on hide their chord error and those seen edge-on show it as a faceted outline.
+# silhouette=True counts only the latter (|normal . view| < 0.25).
+def screen_error(samples, radius=1, eye=(3.5, 3.5, 2.5), fov=40.0, height=600, silhouette=False):
+    eye = np.asarray(eye, dtype=float) * radius
+    forward = -eye / np.linalg.norm(eye)
+    right = np.cross(forward, (0.0, 0.0, 1.0))
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    scale = height / 2 / np.tan(np.radians(fov) / 2)
+
+    def project(points):
+        d = points - eye
+        return scale * np.stack([d @ right, d @ up], axis=-1) / (d @ forward)[..., None]
+
+    tri = samples.triangles
+    u = samples.u[tri]
+    u_mid = np.arctan2(np.sin(u).sum(axis=1), np.cos(u).sum(axis=1))
+    v_mid = samples.v[tri].mean(axis=1)
+    surface = np.stack(torus_point(u_mid, v_mid, radius), axis=-1)
+    normal = surface_normal(u_mid, v_mid)
+    # Only the offset along the normal changes the picture; sliding along the surface does not
+    offset = np.einsum('ij,ij->i', samples.points[tri].mean(axis=1) - surface, normal)
+    error = np.linalg.norm(project(surface + offset[:, None] * normal) - project(surface), axis=-1)
+    if silhouette:
+        view = surface - eye
+        view /= np.linalg.norm(view, axis=-1, keepdims=True)
+        error = error[np.abs(np.einsum('ij,ij->i', normal, view)) < 0.25]
+    return error.max() if len(error) else 0.0
+
+# Radical inverse of 1..count in `base`: the Halton low-discrepancy sequence in [0, 1)
+def halton(count, base):
+    index = np.arange(1, count + 1)
+    result = np.zeros(count)
+    scale = 1.0
+    while index.any():
+        scale /= base
+        index, digit = np.divmod(index, base)
+        result += digit * scale
+    return result
+
+# Inverse CDF of v under the area element r (r + r cos(v + pi)), whose CDF is (v - sin v) / 2 pi.
+# Newton from the small-v expansion v^3 / 6; the CDF is symmetric about pi, so only the lower
+# half is solved and the upper half mirrored.
+def equal_area_v(q):
+    q = np.asarray(q, dtype=float)
+    lower = np.minimum(q, 1 - q)
+    target = 2 * np.pi * lower
+    v = np.cbrt(6 * target)
+    for _ in range(20):
+        v = np.clip(v - (v - np.sin(v) - target) / np.maximum(1 - np.cos(v), 1e-300), 0, np.pi)
+    return np.where(q <= 0.5, v, 2 * np.pi - v)
+
+# Points an equal-area cloud needs to match the marker spacing of a resolution x resolution grid
+# on the outer rim, where the grid is sparsest: the grid's rim cell is 4 pi r / n by 2 pi r / n
+# and the surface area is 4 pi^2 r^2, so half as many points.
+def grid_equivalent_count(resolution):
+    return max(1, resolution * resolution // 2)
+
+# Point cloud of `count` points with uniform density over the surface. 'halton' places them
+# on a low-discrepancy sequence (bases 2 and 3), 'random' draws them from `seed`.
+def equal_area_horn_torus(count=5000, radius=1, saturation=1.0, method='halton', color_model='hls', seed=None):
+    if method == 'halton':
+        a, b = halton(count, 2), halton(count, 3)
+    elif method == 'random':
+        a, b = np.random.default_rng(seed).random((2, count))
+    else:
+        raise ValueError(f"Unknown sampling method {method!r}")
+    started = log.start()
+    with span('equal-area sampling', method=method, count=count):
+        u = 2 * np.pi * a
+        v = equal_area_v(b)
+        points = np.stack(torus_point(u, v, radius), axis=-1)
+        colors = COLOR_MODELS[color_model](u, v, saturation)
+    log.summary(logger, 'equal_area_horn_torus', started, method=method, points=count)
+    return SurfaceSamples(u, v, points, colors, None, None)
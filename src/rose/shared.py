@@ -0,0 +1,206 @@
+import atexit
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import struct
+import sys
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from rose import log
+from rose.color import COLOR_MODELS
+from rose.geometry import generate_3d_horn_torus
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Geometry shared between the worker processes of one machine.
+#
+# Each (resolution, radius, saturation, color model) layer lives in one named shared memory
+# segment. The first process to ask for a layer generates it straight into the segment;
+# every later one maps the same pages without copying, so memory stays flat as workers are
+# added. A reference count in the segment header, updated under a file lock, tracks how
+# many handles are open across all processes; the last release unlinks the segment.
+#
+#   store = SharedGeometryStore()
+#   with store.get(200, radius=0.5, saturation=0.5) as layer:
+#       X, Y, Z, rgba = layer.arrays
+#
+# Python's resource tracker would unlink a segment when whichever process touched it first
+# exits, so segments are untracked and their lifetime is left to the reference count. A
+# process that dies holding handles leaks its counts; purge() removes a store's segments.
+
+MAGIC = b'ROSESHM\0'
+VERSION = 1
+# magic, version, reference count, resolution, radius, saturation, color model
+HEADER = struct.Struct('<8sIiIdd16s')
+HEADER_SIZE = 64  # keeps the arrays 8-byte aligned
+SHM_DIR = '/dev/shm'
+
+# Field offsets for updating the reference count in place
+_REFCOUNT = struct.Struct('<i')
+_REFCOUNT_OFFSET = 12
+
+def _segment_size(resolution):
+    return HEADER_SIZE + resolution * resolution * 7 * 8  # X, Y, Z and four RGBA channels
+
+# A segment whose close() leaves the mapping to outstanding arrays instead of failing: the
+# memory is unmapped when the last array using it is collected
+class _Segment(shared_memory.SharedMemory):
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+def _open_segment(name, size=0):
+    create = size > 0
+    if sys.version_info >= (3, 13):
+        return _Segment(name, create=create, size=size, track=False)
+    segment = _Segment(name, create=create, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+def _unlink(segment):
+    if sys.version_info < (3, 13):
+        resource_tracker.register(segment._name, 'shared_memory')  # unlink() unregisters it again
+    segment.unlink()
+
+# Views of X, Y, Z and RGBA inside a segment's buffer. np.frombuffer holds a buffer export,
+# so the mapping cannot be closed under arrays that are still alive.
+def _arrays(buffer, resolution):
+    n = resolution * resolution
+    data = np.frombuffer(buffer, dtype='<f8', count=7 * n, offset=HEADER_SIZE)
+    shape = (resolution, resolution)
+    return (data[:n].reshape(shape), data[n:2 * n].reshape(shape), data[2 * n:3 * n].reshape(shape),
+            data[3 * n:].reshape(shape + (4,)))
+
+# One open handle on a shared layer. Arrays kept past release() stay valid, but no longer
+# count towards the reference count.
+class SharedLayer:
+    def __init__(self, store, name, segment, resolution):
+        self.store = store
+        self.name = name
+        self.segment = segment
+        self.arrays = _arrays(segment.buf, resolution)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    def release(self):
+        if self.segment is not None:
+            self.store._release(self)
+
+class SharedGeometryStore:
+    def __init__(self, prefix='rose', lock_path=None):
+        self.prefix = prefix
+        self.lock_path = lock_path or os.path.join(tempfile.gettempdir(), f'{prefix}-geometry.lock')
+        self._handles = set()
+        self._thread_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def segment_name(self, resolution, radius, saturation, color_model='hls'):
+        key = f'{resolution}:{float(radius)!r}:{float(saturation)!r}:{color_model}'
+        return f'{self.prefix}-{hashlib.sha1(key.encode()).hexdigest()[:20]}'
+
+    # Serializes reference count updates across threads and processes
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._thread_lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _add_ref(self, segment, amount):
+        count = _REFCOUNT.unpack_from(segment.buf, _REFCOUNT_OFFSET)[0] + amount
+        _REFCOUNT.pack_into(segment.buf, _REFCOUNT_OFFSET, count)
+        return count
+
+    # Handle on a layer, generating and publishing it if no process has yet
+    def get(self, resolution, radius=1, saturation=1.0, color_model='hls'):
+        started = log.start()
+        if isinstance(resolution, bool) or not isinstance(resolution, int) or resolution < 1:
+            raise ValueError(f"Resolution must be a positive integer, got {resolution!r}")
+        if color_model not in COLOR_MODELS:
+            raise ValueError(f"Unknown color model {color_model!r}, expected one of {sorted(COLOR_MODELS)}")
+        name = self.segment_name(resolution, radius, saturation, color_model)
+        with self._locked():
+            try:
+                segment = _open_segment(name)
+            except FileNotFoundError:
+                segment = None
+            if segment is not None:
+                magic, version, *_ = HEADER.unpack_from(segment.buf)
+                if magic != MAGIC or version != VERSION:
+                    segment.close()
+                    raise RuntimeError(f"Shared memory segment {name!r} is not a version {VERSION} rose layer")
+                self._add_ref(segment, 1)
+                published = False
+            else:
+                # Generated under the lock, so no process can map a half-written layer
+                segment = _open_segment(name, _segment_size(resolution))
+                try:
+                    with span('publish shared layer', resolution=resolution, radius=radius):
+                        generate_3d_horn_torus(resolution, radius, saturation, color_model,
+                                               out=_arrays(segment.buf, resolution))
+                    HEADER.pack_into(segment.buf, 0, MAGIC, VERSION, 1, resolution, radius, saturation,
+                                     color_model.encode())
+                except BaseException:
+                    # Without a header the segment would poison every later get() of this layer
+                    _unlink(segment)
+                    segment.close()
+                    raise
+                published = True
+        layer = SharedLayer(self, name, segment, resolution)
+        self._handles.add(layer)
+        log.summary(logger, 'shared layer', started, name=name, published=published)
+        return layer
+
+    def _release(self, layer):
+        segment, layer.segment, layer.arrays = layer.segment, None, None
+        self._handles.discard(layer)
+        with self._locked():
+            if self._add_ref(segment, -1) <= 0:
+                _unlink(segment)
+        segment.close()
+
+    # Open handles on a layer across all processes, or 0 if it is not published
+    def refcount(self, resolution, radius=1, saturation=1.0, color_model='hls'):
+        with self._locked():
+            try:
+                segment = _open_segment(self.segment_name(resolution, radius, saturation, color_model))
+            except FileNotFoundError:
+                return 0
+            try:
+                return _REFCOUNT.unpack_from(segment.buf, _REFCOUNT_OFFSET)[0]
+            finally:
+                segment.close()
+
+    # Release every handle this process still holds
+    def close(self):
+        for layer in list(self._handles):
+            layer.release()
+
+    # Unlink every segment of this store, e.g. on server shutdown or after a worker crashed.
+    # Handles still open elsewhere keep their mapping until they release it. Segments are
+    # found by name in /dev/shm, so this is a no-op where that does not exist.
+    def purge(self):
+        self.close()
+        removed = 0
+        with self._locked():
+            for entry in os.listdir(SHM_DIR) if os.path.isdir(SHM_DIR) else []:
+                if entry.startswith(self.prefix + '-'):
+                    os.unlink(os.path.join(SHM_DIR, entry))
+                    removed += 1
+        return removed
@@ -0,0 +1,133 @@
+import logging
+import struct
+
+import numpy as np
+
+from rose import log
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Path simplification with progressive refinement.
+#
+# Ramer-Douglas-Peucker splits a polyline at the vertex farthest from the chord between two kept
+# vertices, and recurses. Running it to the end and noting, for every vertex, the deviation at
+# which it was kept gives that vertex an importance. Importances are clamped so that a vertex
+# is never more important than the split that made its segment. The vertices with
+# importance >= tolerance are then exactly the RDP simplification at that tolerance, for every
+# tolerance at once. All segments of a level are split together, so each level is one
+# vectorized pass over the remaining vertices.
+#
+# A ranked stream stores the vertices in order of importance, so any prefix of it is a
+# coarser path and more bytes refine it. Coordinates are quantized to 16 bits over the path's
+# bounding box, which errs by less than the finest listed tolerance. All values are
+# little-endian:
+#
+#   b'RRP1', u32 vertex count, u32 level count, 3 * f32 origin, f32 step,
+#   levels * (f32 tolerance, u32 vertices needed for it), largest tolerance first,
+#   vertices * (index along the path, 3 * u16 point), most important first
+#
+# where the index is a u16 for paths of up to 65536 vertices and a u32 beyond, and a point is
+# origin + step * its u16 coordinates.
+#
+# A client reads the header, picks the tolerance it can show (e.g. one pixel), fetches that
+# many records with a range request, and draws them sorted by index.
+
+STREAM_MAGIC = b'RRP1'
+_HEADER = struct.Struct('<4sII4f')
+_LEVEL = struct.Struct('<fI')
+def _record(count):
+    return np.dtype([('index', '<u2' if count <= 1 << 16 else '<u4'), ('point', '<u2', 3)])
+LEVELS = 16  # tolerances of extent / 2^k for k = 1 .. LEVELS
+
+# Distance from each point to the segment from a to b; all arrays shaped (n, 3)
+def segment_distance(points, a, b):
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(length2 > 0, np.einsum('ij,ij->i', points - a, ab) / length2, 0)
+    closest = a + np.clip(s, 0, 1)[:, None] * ab
+    return np.linalg.norm(points - closest, axis=-1)
+
+# Importance of every vertex of a polyline (n, 3); the two ends are inf
+def importance(points):
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    result = np.full(n, -1.0)
+    if n == 0:
+        return result
+    result[[0, -1]] = np.inf
+    remaining = np.arange(1, n - 1)
+    with span('rdp importance', vertices=n):
+        while len(remaining):
+            # Each remaining vertex lies between the nearest kept vertices on either side
+            kept = np.flatnonzero(result >= 0)
+            position = np.searchsorted(kept, remaining)
+            left, right = kept[position - 1], kept[position]
+            distance = segment_distance(points[remaining], points[left], points[right])
+            # Farthest vertex of each segment; segments are contiguous runs of `remaining`
+            starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+            best = _run_argmax(distance, starts)
+            split = remaining[best]
+            bound = np.minimum(result[left[best]], result[right[best]])
+            result[split] = np.minimum(distance[best], bound)
+            remaining = np.delete(remaining, best)
+    return result
+
+# Index of the (first) maximum of each run of `values` starting at `starts`, in linear time
+def _run_argmax(values, starts):
+    lengths = np.diff(np.r_[starts, len(values)])
+    hits = np.flatnonzero(values == np.repeat(np.maximum.reduceat(values, starts), lengths))
+    run = np.repeat(np.arange(len(starts)), lengths)[hits]
+    return hits[np.r_[True, run[1:] != run[:-1]]]
+
+# Vertex indices in streaming order: most important first, ties in path order
+def rank(points):
+    return np.argsort(-importance(points), kind='stable')
+
+# Indices (in path order) of the RDP simplification of points at `tolerance`
+def simplify(points, tolerance):
+    return np.flatnonzero(importance(points) >= tolerance)
+
+# Ranked stream of a polyline, see above
+def encode_ranked(points):
+    started = log.start()
+    points = np.asarray(points, dtype=float)
+    weights = importance(points)
+    order = np.argsort(-weights, kind='stable')
+    origin = points.min(axis=0) if len(points) else np.zeros(3)
+    extent = float(np.ptp(points, axis=0).max()) if len(points) else 0.0
+    step = extent / 65535 or 1.0
+    tolerances = extent / 2.0 ** np.arange(1, LEVELS + 1)
+    needed = np.searchsorted(-weights[order], -tolerances, side='right')  # count with importance >= tolerance
+    records = np.empty(len(points), dtype=_record(len(points)))
+    records['index'] = order
+    records['point'] = np.rint((points[order] - origin) / step)
+    data = b''.join([_HEADER.pack(STREAM_MAGIC, len(points), LEVELS, *origin, step),
+                     *(_LEVEL.pack(t, k) for t, k in zip(tolerances, needed)), records.tobytes()])
+    log.summary(logger, 'encode_ranked', started, vertices=len(points), bytes=len(data))
+    return data
+
+def _parse_header(data):
+    magic, count, levels, *origin, step = _HEADER.unpack_from(data)
+    if magic != STREAM_MAGIC:
+        raise ValueError("Not a ranked path stream")
+    table = [_LEVEL.unpack_from(data, _HEADER.size + i * _LEVEL.size) for i in range(levels)]
+    return count, table, _HEADER.size + levels * _LEVEL.size, np.array(origin), step
+
+# Bytes of the stream's prefix that holds the path to within `tolerance` (in the path's
+# units): the vertices of the coarsest listed level whose tolerance is no larger than it, or
+# the whole path if none is; needs only the header
+def prefix_length(data, tolerance):
+    count, table, offset, _, _ = _parse_header(data)
+    vertices = next((k for t, k in table if t <= tolerance), count)
+    return offset + min(max(vertices, 2), count) * _record(count).itemsize
+
+# Decode a whole stream or any prefix of it into (indices, points) in path order
+def decode_ranked(data):
+    count, _, offset, origin, step = _parse_header(data)
+    record = _record(count)
+    available = min(count, (len(data) - offset) // record.itemsize)
+    records = np.frombuffer(data, dtype=record, count=available, offset=offset)
+    records = records[np.argsort(records['index'], kind='stable')]
+    return records['index'].astype(np.intp), origin + step * records['point'].astype(float)
@@ -0,0 +1,98 @@
+import logging
+import wave
+from fractions import Fraction
+
+import numpy as np
+
+from rose import log, phase
+from rose.texture import path_colors
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# The song of a path: audio synthesized from a Lissajous path and the colors along it.
+#
+# Each plane is a voice. The alchemical voice sounds at `pitch` and the developmental voice
+# at pitch * omega_u / omega_v, so commensurate paths play a consonant interval and
+# incommensurate ones beat against each other. Meanwhile the path itself is travelled
+# at `tempo` alchemical cycles per second. The colors at the current point set each
+# voice's timbre: its red, green and blue weigh the first three harmonics (the
+# alchemical color of v for one voice, the developmental color of u for the other).
+# Opacity 1 - v / 2 pi sets the loudness, so every cycle strikes at the singularity
+# and fades out at Black.
+#
+# Audio is generated in blocks of `block` frames, as (frames, 2) float32 with the
+# alchemical voice on the left and the developmental voice on the right. The path's angles and
+# the oscillators' phases are taken at each frame from rose.phase, so they neither drift over a
+# long song nor depend on the block size, and a song of any length streams in constant memory.
+
+RATE = 44100
+BLOCK = 4096
+HARMONICS = np.arange(1, 4)  # weighted by red, green and blue
+
+# Frequencies of the (developmental, alchemical) voices of a path with these rates of u and v
+def voice_frequencies(omega_u, omega_v, pitch=220.0):
+    return pitch * omega_u / omega_v, pitch
+
+# Sum of the first harmonics of `angle`, weighted per sample by `weights` (n, 3) and scaled by `gain`
+def _voice(angle, weights, gain):
+    tones = np.sin(angle[:, None] * HARMONICS)
+    tones *= weights
+    return tones.sum(axis=1) * gain
+
+# Blocks of (frames, 2) float32 samples of a Heros Journey's song, `seconds` long (by default
+# one journey at the given tempo)
+def song_blocks(u_start=0.0, u_end=np.pi, length=1.0, radius=1.0, seconds=None, tempo=0.5, pitch=220.0,
+                rate=RATE, block=BLOCK, gain=0.8):
+    frames = song_frames(length, seconds, tempo, rate)
+    saturation = min(float(radius), 1.0)
+    # Path turns per alchemical cycle, cycles per frame, and voice turns per frame
+    rate_u, rate_v = phase.journey_rates(u_start, u_end, length)
+    step = phase.exact_rate(tempo) / rate
+    developmental_pitch, alchemical_pitch = voice_frequencies(rate_u, rate_v, phase.exact_rate(pitch))
+    tones = (alchemical_pitch / rate, developmental_pitch / rate)
+    for start in range(0, frames, block):
+        n = min(block, frames - start)
+        u = phase.angles(rate_u, u_start, start, n, step)
+        v = phase.angles(rate_v, 0.0, start, n, step)
+        alchemical = path_colors(u, v, 'alchemical', saturation)
+        developmental = path_colors(u, v, 'hls', saturation)
+        loudness = gain * developmental[:, 3] / len(HARMONICS)  # opacity is the same in both models
+        out = np.empty((n, 2), dtype=np.float32)
+        out[:, 0] = _voice(2 * np.pi * phase.turns(tones[0], Fraction(0), start, n), alchemical[:, :3], loudness)
+        out[:, 1] = _voice(2 * np.pi * phase.turns(tones[1], Fraction(0), start, n), developmental[:, :3], loudness)
+        yield out
+
+# Frames in a song of `seconds`, or of one journey of `length` cycles at `tempo` cycles per second
+def song_frames(length, seconds=None, tempo=0.5, rate=RATE):
+    if seconds is None:
+        seconds = length / tempo
+    if seconds <= 0:
+        raise ValueError("A song must last a positive number of seconds")
+    return int(round(seconds * rate))
+
+def _pcm16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+
+# Stream a song to `out`, a binary file object, as 16-bit stereo WAV. The frame count is known
+# up front, so the header is written once and `out` need not be seekable (e.g. stdout).
+def write_wav(out, rate=RATE, **song):
+    started = log.start()
+    frames = song_frames(song.get('length', 1.0), song.get('seconds'), song.get('tempo', 0.5), rate)
+    with span('song', frames=frames), wave.open(out, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.setnframes(frames)
+        for samples in song_blocks(rate=rate, **song):
+            wav.writeframesraw(_pcm16(samples))
+    log.summary(logger, 'write_wav', started, logging.INFO, frames=frames, seconds=frames / rate)
+    return frames
+
+# Stream a song to `out` as raw interleaved float32 little-endian stereo, for piping to a player
+def write_raw(out, rate=RATE, **song):
+    frames = 0
+    for samples in song_blocks(rate=rate, **song):
+        out.write(samples.astype('<f4', copy=False).tobytes())
+        frames += len(samples)
+    return frames
@@ -0,0 +1,190 @@
+import json
+import math
+import os
+
+from rose.color import COLOR_MODELS
+from rose.paths import SPACINGS
+
+# A render spec describes one reproducible scene: nested torus layers, their color model,
+# journeys drawn on the surface and the files to produce. Specs are JSON or YAML; a file
+# may hold one spec, a list of specs, or (YAML) several documents.
+#
+#   name: poster
+#   resolution: 400
+#   layers: 20                    # or a list of {radius, saturation}
+#   color: hls
+#   sampling: grid                # or equal_area, for figure outputs
+#   paths:
+#     - {u_start: 0, u_end: 3.14159, length: 3}   # spacing: time, arc or curvature
+#   outputs:
+#     - poster.html               # format inferred from the extension
+#     - {path: poster.rsc, format: wire}
+
+FIGURE_FORMATS = ('html', 'json', 'png')
+SAMPLINGS = ('grid', 'equal_area')
+EXPORT_FORMATS = ('wire', 'npz', 'csv', 'glb')
+
+EXTENSIONS = {
+    '.html': 'html',
+    '.json': 'json',
+    '.png': 'png',
+    '.rsc': 'wire',
+    '.npz': 'npz',
+    '.csv': 'csv',
+    '.glb': 'glb',
+}
+
+DEFAULT_SPEC = {
+    'name': 'rose',
+    'resolution': 100,
+    'layers': 20,
+    'color': 'hls',
+    'sampling': 'grid',
+    'paths': [],
+    'outputs': [],
+}
+
+DEFAULT_PATH = {
+    'radius': 1.0,
+    'u_start': 0.0,
+    'u_end': 3.141592653589793,
+    'length': 1.0,
+    'samples_per_cycle': 200,
+    'spacing': 'time',
+    'color': '#000000',
+}
+
+class SpecError(ValueError):
+    pass
+
+def _positive_int(spec, name):
+    value = spec[name]
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise SpecError(f"spec {spec['name']!r}: {name} must be a positive integer, got {value!r}")
+    return value
+
+# A finite number (bools and numeric strings are not) from `item`, which `where` names in errors
+def _number(spec, item, name, where, positive=False):
+    value = item[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise SpecError(f"spec {spec['name']!r}: {where}{name} must be a number, got {value!r}")
+    if positive and value <= 0:
+        raise SpecError(f"spec {spec['name']!r}: {where}{name} must be positive, got {value!r}")
+    return float(value)
+
+def _list(spec, name):
+    if not isinstance(spec[name], list):
+        raise SpecError(f"spec {spec['name']!r}: {name} must be a list, got {spec[name]!r}")
+    return spec[name]
+
+def _layers(spec):
+    layers = spec['layers']
+    if isinstance(layers, int) and not isinstance(layers, bool):
+        count = _positive_int(spec, 'layers')
+        # Same nesting as render_horn_torus_plotly: saturation grows with radius
+        return [{'radius': (i + 1) / count, 'saturation': (i + 1) / count} for i in range(count)]
+    if not isinstance(layers, list) or not layers:
+        raise SpecError(f"spec {spec['name']!r}: layers must be a positive integer or a non-empty list, got {layers!r}")
+    normalized = []
+    for i, layer in enumerate(layers):
+        where = f"layer {i} "
+        if not isinstance(layer, dict):
+            raise SpecError(f"spec {spec['name']!r}: {where}must be a mapping of radius and saturation, got {layer!r}")
+        unknown = set(layer) - {'radius', 'saturation'}
+        if unknown:
+            raise SpecError(f"spec {spec['name']!r}: unknown layer keys {sorted(unknown)}")
+        if 'radius' not in layer:
+            raise SpecError(f"spec {spec['name']!r}: every layer needs a radius")
+        radius = _number(spec, layer, 'radius', where, positive=True)
+        saturation = _number(spec, layer, 'saturation', where) if 'saturation' in layer else radius
+        normalized.append({'radius': radius, 'saturation': saturation})
+    return normalized
+
+def _paths(spec):
+    paths = []
+    for i, path in enumerate(_list(spec, 'paths')):
+        where = f"path {i} "
+        if not isinstance(path, dict):
+            raise SpecError(f"spec {spec['name']!r}: {where}must be a mapping, got {path!r}")
+        unknown = set(path) - set(DEFAULT_PATH)
+        if unknown:
+            raise SpecError(f"spec {spec['name']!r}: unknown path keys {sorted(unknown)}")
+        path = dict(DEFAULT_PATH, **path)
+        for name in ('radius', 'length'):
+            path[name] = _number(spec, path, name, where, positive=True)
+        for name in ('u_start', 'u_end'):
+            path[name] = _number(spec, path, name, where)
+        value = path['samples_per_cycle']
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise SpecError(f"spec {spec['name']!r}: {where}samples_per_cycle must be a positive integer, got {value!r}")
+        if path['spacing'] not in SPACINGS:
+            raise SpecError(f"spec {spec['name']!r}: unknown path spacing {path['spacing']!r}, expected one of {SPACINGS}")
+        if not isinstance(path['color'], str):
+            raise SpecError(f"spec {spec['name']!r}: {where}color must be a string, got {path['color']!r}")
+        paths.append(path)
+    return paths
+
+def _outputs(spec, base_dir):
+    outputs = []
+    for output in _list(spec, 'outputs'):
+        if isinstance(output, str):
+            output = {'path': output}
+        if not isinstance(output, dict) or not isinstance(output.get('path'), str):
+            raise SpecError(f"spec {spec['name']!r}: every output needs a path, got {output!r}")
+        output = dict(output)
+        fmt = output.get('format') or EXTENSIONS.get(os.path.splitext(output['path'])[1].lower())
+        if fmt not in FIGURE_FORMATS + EXPORT_FORMATS:
+            raise SpecError(f"spec {spec['name']!r}: cannot tell the format of output {output['path']!r}")
+        output['format'] = fmt
+        output['path'] = os.path.join(base_dir, output['path'])
+        outputs.append(output)
+    return outputs
+
+# Fill in defaults and validate; relative output paths resolve against base_dir
+def normalize_spec(spec, base_dir='.'):
+    if not isinstance(spec, dict):
+        raise SpecError(f"A spec must be a mapping, got {spec!r}")
+    unknown = set(spec) - set(DEFAULT_SPEC)
+    if unknown:
+        raise SpecError(f"Unknown spec keys: {sorted(unknown)}")
+    spec = dict(DEFAULT_SPEC, **spec)
+    if not isinstance(spec['name'], str):
+        raise SpecError(f"Spec name must be a string, got {spec['name']!r}")
+    _positive_int(spec, 'resolution')
+    if spec['color'] not in COLOR_MODELS:
+        raise SpecError(f"spec {spec['name']!r}: unknown color model {spec['color']!r}, "
+                        f"expected one of {sorted(COLOR_MODELS)}")
+    if spec['sampling'] not in SAMPLINGS:
+        raise SpecError(f"spec {spec['name']!r}: unknown sampling {spec['sampling']!r}, expected one of {list(SAMPLINGS)}")
+    spec['layers'] = _layers(spec)
+    spec['paths'] = _paths(spec)
+    spec['outputs'] = _outputs(spec, base_dir)
+    return spec
+
+def _read_documents(path):
+    try:
+        with open(path) as f:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                try:
+                    import yaml
+                except ImportError:
+                    raise SpecError(f"{path}: reading YAML specs needs PyYAML (pip install pyyaml)") from None
+                try:
+                    return [doc for doc in yaml.safe_load_all(f) if doc is not None]
+                except yaml.YAMLError as exc:
+                    raise SpecError(f"{path}: not valid YAML: {exc}") from exc
+            try:
+                return [json.load(f)]
+            except json.JSONDecodeError as exc:
+                raise SpecError(f"{path}: not valid JSON: {exc}") from exc
+    except OSError as exc:
+        raise SpecError(f"{path}: cannot read spec file: {exc.strerror or exc}") from exc
+
+# Load every spec in a JSON or YAML file
+def load_specs(path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = []
+    for doc in _read_documents(path):
+        for spec in doc if isinstance(doc, list) else [doc]:
+            specs.append(normalize_spec(spec, base_dir))
+    return specs
@@ -0,0 +1,37 @@
+import pytest
+
+from rose.cli import build_parser
+
+@pytest.mark.parametrize('argv', [
+    ['path', '--length', '0'],
+    ['path', '--length', '-1'],
+    ['song', '--tempo', '0'],
+    ['song', '--tempo', 'nan'],
+    ['song', '--seconds', '0'],
+])
+def test_non_positive_arguments_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(argv)
+
+def test_spec_errors_are_prefixed_once(tmp_path, capsys):
+    from rose.cli import main
+    spec = tmp_path / 'spec.json'
+    spec.write_text('{"name": "rose", "outputs": ["scene.xyz"]}')
+    assert main(['export', str(spec)]) == 2
+    assert capsys.readouterr().err.startswith("rose: spec 'rose': cannot tell the format")
+
+@pytest.mark.parametrize('name, text, message', [
+    ('missing.json', None, 'cannot read spec file'),
+    ('spec.json', '{"layers": [', 'not valid JSON'),
+    ('spec.yaml', 'layers: [1, 2\nname: x', 'not valid YAML'),
+])
+def test_unreadable_spec_files_are_reported(tmp_path, capsys, name, text, message):
+    from rose.cli import main
+    if name.endswith('.yaml'):
+        pytest.importorskip('yaml')
+    if text is not None:
+        (tmp_path / name).write_text(text)
+    assert main(['export', str(tmp_path / name)]) == 2
+    err = capsys.readouterr().err
+    assert err.startswith(f"rose: {tmp_path / name}: {message}")
+    assert 'Traceback' not in err
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from rose import coverage, paths
+
+# All pairs of non-adjacent segments that cross in the periodic (u, v) square, O(n^2)
+def brute_force_crossings(u, v):
+    hits = []
+    for i in range(len(u) - 1):
+        p = np.array([u[i], v[i]])
+        r = np.array([u[i + 1] - u[i], v[i + 1] - v[i]])
+        j = np.arange(i + 2, len(u) - 1)
+        q = np.stack([u[j], v[j]], axis=-1)
+        w = np.stack([u[j + 1] - u[j], v[j + 1] - v[j]], axis=-1)
+        q = q - 2 * np.pi * np.round((q - p) / (2 * np.pi))
+        denominator = r[0] * w[:, 1] - r[1] * w[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((q[:, 0] - p[0]) * w[:, 1] - (q[:, 1] - p[1]) * w[:, 0]) / denominator
+            s = ((q[:, 0] - p[0]) * r[1] - (q[:, 1] - p[1]) * r[0]) / denominator
+        crossing = (denominator != 0) & (t >= 0) & (t < 1) & (s >= 0) & (s < 1)
+        hits += [(i, k) for k in j[crossing]]
+    return sorted(hits)
+
+@pytest.mark.parametrize('bins', [4, 16, 64, 256])
+def test_crossings_match_brute_force(bins):
+    rng = np.random.default_rng(1)
+    u, v = np.cumsum(rng.normal(0, 0.05, (2, 1500)), axis=1)
+    found = coverage.self_intersections(u, v, bins)
+    assert sorted(zip(found['first'].tolist(), found['second'].tolist())) == brute_force_crossings(u, v)
+
+def test_figure_eight_crosses_once_at_its_centre():
+    t = np.linspace(0, 2 * np.pi, 2001)
+    found = coverage.self_intersections(np.pi + np.sin(t), np.pi + 0.5 * np.sin(2 * t), bins=64)
+    np.testing.assert_allclose([found['u'][0], found['v'][0]], [np.pi, np.pi])
+    assert len(found['path']) == 1
+
+def test_journeys_meet_themselves_only_at_the_singularity():
+    angles = [paths.journey_angles(0.0, u_end, 8.0)[1:] for u_end in np.linspace(0, 20, 50)]
+    statistics = coverage.path_statistics([u for u, _ in angles], [v for _, v in angles])
+    assert (statistics['crossings'] == 0).all()
+    assert (statistics['passages'] == 8).all()
+
+def test_coverage_counts_match_visit_counts():
+    rng = np.random.default_rng(2)
+    u, v = np.cumsum(rng.normal(0, 0.1, (2, 3000)), axis=1)
+    visits = coverage.visit_counts(u, v, bins=32)
+    statistics = coverage.path_statistics(u, v, bins=32)
+    assert statistics['cells'][0] == np.count_nonzero(visits)
+    assert statistics['visits'][0] == visits.sum()
+    assert statistics['revisits'][0] == visits.sum() - np.count_nonzero(visits)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from rose import color, dwell, paths
+
+def test_histograms_sum_to_the_journey_and_match_alchemical_arc():
+    t, u, v = paths.journey_angles(0.3, 5.0, 3.0, spacing='arc')
+    arcs, hues = dwell.dwell_times(t, u, v)
+    assert np.isclose(arcs.sum(), 3.0) and np.isclose(hues.sum(), 3.0)
+    names = np.array(dwell.ARCS)[dwell.arc_index(v)]
+    assert (names == color.alchemical_arc(v)).all()
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(dwell, 'CACHE_SIZE', 3)
+    dwell.clear_cache()
+    specs = [{'length': length, 'samples_per_cycle': 20} for length in (1, 2, 3, 4, 5)]
+    arcs, _ = dwell.journey_dwell(specs)
+    assert len(dwell._cache) == 3
+    np.testing.assert_allclose(arcs.sum(axis=1), [1, 2, 3, 4, 5])
+    again, _ = dwell.journey_dwell(specs)
+    np.testing.assert_array_equal(again, arcs)
+    dwell.clear_cache()
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from rose.factored import factored_horn_torus
+from rose.geometry import generate_3d_horn_torus
+
+@pytest.mark.parametrize('color_model', ['hls', 'alchemical'])
+def test_factored_layer_is_the_generated_tuple(color_model):
+    layer = factored_horn_torus(24, 0.5, 0.8, color_model)
+    expected = generate_3d_horn_torus(24, 0.5, 0.8, color_model)
+    X, Y, Z, rgba = layer
+    for found, array in zip((X, Y, Z, rgba), expected):
+        np.testing.assert_array_equal(found, array)
+    assert len(layer) == len(expected)
+    for index in (0, 3, -1, slice(None, 3), slice(1, None, 2), slice(None)):
+        found = layer[index]
+        if isinstance(index, slice):
+            assert len(found) == len(expected[index])
+            for a, b in zip(found, expected[index]):
+                np.testing.assert_array_equal(a, b)
+        else:
+            np.testing.assert_array_equal(found, expected[index])
+
+def test_only_requested_arrays_are_built():
+    layer = factored_horn_torus(16)
+    layer[2:3]
+    assert 'Z' in vars(layer) and 'X' not in vars(layer) and 'rgba' not in vars(layer)
+    with pytest.raises(IndexError):
+        layer[4]
@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+import pytest
+
+from rose.cache import RenderCache
+from rose.jobs import RenderJobQueue
+from rose.spec import SpecError
+
+SPEC = {
+    'resolution': 12,
+    'layers': [{'radius': 0.5}, {'radius': 1, 'saturation': 0.8}],
+    'color': 'alchemical',
+    'sampling': 'equal_area',
+    'paths': [{'length': 2, 'color': '#ff0000'}],
+}
+
+def test_jobs_render_cli_specs():
+    async def run():
+        async with RenderJobQueue(cache=RenderCache()) as queue:
+            job = queue.submit(dict(SPEC, name='poster', outputs=['poster.html']))
+            # Names and outputs do not change the figure, so this is the same render
+            assert queue.submit(dict(SPEC, name='other')) == job
+            figure = json.loads(await queue.result(job))
+            with pytest.raises(SpecError):
+                queue.submit({'layers': []})
+            return figure
+    figure = asyncio.run(run())
+    assert [trace['mode'] for trace in figure['data']][-1] == 'lines'
+    assert len(figure['data']) == 3
+
+def test_close_cancels_running_jobs():
+    async def run():
+        queue = RenderJobQueue(cache=RenderCache())
+        await queue.start()
+        job = queue.submit(SPEC)
+        while queue.status(job)['state'] == 'queued':
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(queue.close(), 60)
+        return queue.status(job)['state']
+    assert asyncio.run(run()) == 'cancelled'
+
+def test_submit_needs_a_started_queue():
+    with pytest.raises(RuntimeError, match='not started'):
+        RenderJobQueue(cache=RenderCache()).submit(SPEC)
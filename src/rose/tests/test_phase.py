@@ -0,0 +1,60 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from rose import phase
+from rose.paths import journey_angles
+
+def _concatenated(chunks):
+    return [np.concatenate(parts) for parts in zip(*chunks)]
+
+# Splitting a path into chunks of any size gives bit-identical samples
+def test_chunks_are_bit_identical_for_any_chunk_size():
+    count = 3 * phase.BLOCK + 123
+    reference = _concatenated(phase.path_chunks(0.3717, 1.0, count, 0.01, phase_u=0.5, chunk=count))
+    for chunk in (1, 7, 1000, phase.BLOCK, phase.BLOCK + 1, 10000):
+        chunks = _concatenated(phase.path_chunks(0.3717, 1.0, count, 0.01, phase_u=0.5, chunk=chunk))
+        for expected, found in zip(reference, chunks):
+            assert np.array_equal(expected, found)
+
+@pytest.mark.parametrize('u_start, u_end, length', [(0.0, np.pi, 1.0), (0.5, 7.0, 3.5), (2.0, -4.0, 12.0)])
+def test_journey_chunks_match_journey_angles(u_start, u_end, length):
+    t, u, v = _concatenated(phase.journey_chunks(u_start, u_end, length, chunk=97))
+    expected_t, expected_u, expected_v = journey_angles(u_start, u_end, length)
+    np.testing.assert_allclose(t, expected_t, atol=1e-12)
+    for found, expected in ((u, expected_u), (v, expected_v)):
+        wrapped = np.angle(np.exp(1j * (found - expected)))
+        assert np.abs(wrapped).max() < 1e-9
+        assert ((found >= 0) & (found < 2 * np.pi)).all()
+
+# Far along a long path the angle is still within rounding of the exact turn
+def test_phase_does_not_drift():
+    per_sample = Fraction(1, 3) + Fraction(1, 1 << 40)
+    start = 10 ** 9 + 4321
+    turns = phase.turns(per_sample, Fraction(1, 7), start, 5)
+    exact = [float((Fraction(1, 7) + per_sample * k) % 1) for k in range(start, start + 5)]
+    np.testing.assert_allclose(turns, exact, rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('rate_u, rate_v, expected', [
+    (Fraction(1, 3), Fraction(1, 2), 6),
+    (Fraction(2, 3), 1, 3),
+    (Fraction(3, 4), Fraction(5, 6), 12),
+    (1, 1, 1),
+    (0, 0, 0),
+])
+def test_closure_time(rate_u, rate_v, expected):
+    assert phase.closure_time(rate_u, rate_v) == expected
+    if expected:
+        # The path is back at its start after exactly that time in both angles, and not before
+        closes = lambda t: all((Fraction(rate) * t).denominator == 1 for rate in (rate_u, rate_v))
+        assert closes(expected)
+        earlier = {Fraction(n, d) for d in range(1, 13) for n in range(1, expected * d)}
+        assert not any(closes(t) for t in earlier)
+
+def test_closed_path_ends_where_it_started():
+    rate_u = phase.exact_rate(2 / 3)
+    closure = phase.closure_time(rate_u, 1)
+    _, u, v = _concatenated(phase.path_chunks(rate_u, 1, 3001, closure / 3000, chunk=500))
+    for angle in (u, v):
+        assert abs(np.angle(np.exp(1j * (angle[-1] - angle[0])))) < 1e-12
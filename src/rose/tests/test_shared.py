@@ -0,0 +1,53 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from rose import shared
+from rose.geometry import generate_3d_horn_torus
+
+@pytest.fixture
+def store(tmp_path):
+    store = shared.SharedGeometryStore(prefix=f'rosetest{uuid.uuid4().hex[:8]}',
+                                       lock_path=str(tmp_path / 'geometry.lock'))
+    yield store
+    store.purge()
+
+def test_handles_share_one_counted_segment(store):
+    first = store.get(16, radius=0.5)
+    second = store.get(16, radius=0.5)
+    assert store.refcount(16, radius=0.5) == 2
+    for array, expected in zip(first.arrays, generate_3d_horn_torus(16, 0.5)):
+        np.testing.assert_array_equal(array, expected)
+    first.arrays[0][0, 0] = 7.0  # both handles map the same pages
+    assert second.arrays[0][0, 0] == 7.0
+    first.release()
+    first.release()  # releasing twice is harmless
+    assert store.refcount(16, radius=0.5) == 1
+    with second:
+        pass
+    assert store.refcount(16, radius=0.5) == 0
+
+def test_close_releases_every_handle(store):
+    store.get(8)
+    store.get(8, color_model='alchemical')
+    store.close()
+    assert store.refcount(8) == store.refcount(8, color_model='alchemical') == 0
+
+def test_bad_arguments_publish_nothing(store):
+    with pytest.raises(ValueError):
+        store.get(8, color_model='nope')
+    with pytest.raises(ValueError):
+        store.get(0)
+    assert store.refcount(8, color_model='nope') == 0
+
+def test_failed_generation_unlinks_the_segment(store, monkeypatch):
+    def fail(*args, **kwargs):
+        raise MemoryError
+    monkeypatch.setattr(shared, 'generate_3d_horn_torus', fail)
+    with pytest.raises(MemoryError):
+        store.get(8)
+    assert store.refcount(8) == 0
+    monkeypatch.undo()
+    with store.get(8) as layer:
+        np.testing.assert_array_equal(layer.arrays[2], generate_3d_horn_torus(8)[2])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from rose import paths, simplify
+
+# Textbook recursive Ramer-Douglas-Peucker: indices kept at `tolerance`
+def reference_rdp(points, tolerance):
+    keep = {0, len(points) - 1}
+    stack = [(0, len(points) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        inner = np.arange(a + 1, b)
+        ab = points[b] - points[a]
+        length2 = ab @ ab
+        s = np.clip((points[inner] - points[a]) @ ab / length2, 0, 1) if length2 > 0 else np.zeros(len(inner))
+        distance = np.linalg.norm(points[inner] - (points[a] + s[:, None] * ab), axis=1)
+        best = int(np.argmax(distance))
+        if distance[best] >= tolerance:
+            split = a + 1 + best
+            keep.add(split)
+            stack += [(a, split), (split, b)]
+    return np.array(sorted(keep))
+
+@pytest.mark.parametrize('points', [
+    paths.journey_points(1.0, 0.3, 5.0, 6.0, 50),
+    np.cumsum(np.random.default_rng(3).normal(size=(400, 3)), axis=0),
+])
+def test_importance_matches_recursive_rdp(points):
+    weights = simplify.importance(points)
+    extent = np.ptp(points, axis=0).max()
+    for tolerance in extent * np.array([0.3, 0.1, 0.03, 0.01, 0.003]):
+        np.testing.assert_array_equal(np.flatnonzero(weights >= tolerance), reference_rdp(points, tolerance))
+
+def test_stream_prefixes_decode_to_the_simplified_path():
+    points = paths.journey_points(1.0, 0.3, 5.0, 8.0, 100)
+    data = simplify.encode_ranked(points)
+    _, table, _, _, step = simplify._parse_header(data)
+    for tolerance, _ in table[::4]:
+        indices, decoded = simplify.decode_ranked(data[:simplify.prefix_length(data, tolerance)])
+        np.testing.assert_array_equal(indices, simplify.simplify(points, tolerance))
+        assert np.abs(decoded - points[indices]).max() <= step
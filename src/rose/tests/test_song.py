@@ -0,0 +1,20 @@
+import numpy as np
+
+from rose import song
+
+# Lowest partial holding a noticeable share of the power, and the strongest one, in Hz
+def _partials(signal, rate):
+    power = np.abs(np.fft.rfft(signal)) ** 2
+    frequencies = np.fft.rfftfreq(len(signal), 1 / rate)
+    return frequencies[power > 0.05 * power.max()].min(), frequencies[power.argmax()]
+
+# A journey making half a turn in u per alchemical cycle sounds its voices an octave apart:
+# the alchemical voice (left) at the pitch, the developmental voice (right) an octave below
+def test_voices_play_their_own_pitch():
+    rate = song.RATE
+    samples = np.concatenate(list(song.song_blocks(0.0, np.pi, 1.0, seconds=4, pitch=220.0, rate=rate)))
+    for channel, pitch in ((0, 220.0), (1, 110.0)):
+        fundamental, dominant = _partials(samples[:, channel], rate)
+        assert abs(fundamental - pitch) < 5
+        assert np.isclose(dominant / pitch, np.round(dominant / pitch), atol=0.01)
+        assert 1 <= np.round(dominant / pitch) <= len(song.HARMONICS)
@@ -0,0 +1,31 @@
+import pytest
+
+from rose.spec import SpecError, normalize_spec
+
+@pytest.mark.parametrize('spec', [
+    {'layers': []},
+    {'layers': [5]},
+    {'layers': [{'radius': 'x'}]},
+    {'layers': [{'radius': 0}]},
+    {'layers': [{'radius': 1, 'saturation': None}]},
+    {'layers': True},
+    {'resolution': 2.5},
+    {'paths': [{'length': '2'}]},
+    {'paths': [{'length': 0}]},
+    {'paths': [{'radius': 'x'}]},
+    {'paths': [{'u_end': float('nan')}]},
+    {'paths': [{'samples_per_cycle': 1.5}]},
+    {'paths': [3]},
+    {'paths': {'length': 2}},
+    {'outputs': [{'format': 'png'}]},
+    {'name': 7},
+    [],
+])
+def test_bad_specs_raise_spec_error(spec):
+    with pytest.raises(SpecError):
+        normalize_spec(spec)
+
+def test_numbers_are_normalized():
+    spec = normalize_spec({'layers': [{'radius': 1}], 'paths': [{'length': 2, 'u_end': 3}]})
+    assert spec['layers'] == [{'radius': 1.0, 'saturation': 1.0}]
+    assert spec['paths'][0]['length'] == 2.0 and spec['paths'][0]['u_end'] == 3.0
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from rose import paths
+from rose.color import COLOR_MODELS, circle_angle
+from rose.texture import path_colors
+
+@pytest.mark.parametrize('model', ['hls', 'alchemical'])
+@pytest.mark.parametrize('filter', ['nearest', 'bilinear'])
+def test_cycle_boundaries_match_the_exact_model(model, filter):
+    _, u, v = paths.journey_angles(0.3, 2.0, 3.0)
+    boundaries = np.array([0.0, 2 * np.pi, 4 * np.pi, v[-1]])
+    u = np.full(len(boundaries), 0.0)
+    expected = COLOR_MODELS[model](u, circle_angle(boundaries), 1.0)
+    np.testing.assert_allclose(path_colors(u, boundaries, model, filter=filter), expected, atol=1e-6)
+    assert path_colors(u[:1], boundaries[:1], model, filter=filter)[0, 3] == 1
+    assert (path_colors(u[1:], boundaries[1:], model, filter=filter)[:, 3] == 0).all()
+
+# Only rounding of 2 pi k closes a cycle, however large v is
+def test_only_exact_multiples_close_a_cycle():
+    for cycles in (1, 3, 1000, 10 ** 6):
+        end = 2 * np.pi * cycles
+        assert circle_angle(end) == 2 * np.pi
+        np.testing.assert_allclose(circle_angle(end + 1e-6), 1e-6, atol=1e-8)
+        assert path_colors([0.0], [end + 1e-6])[0, 3] > 0.99
+
+def test_texture_cache_is_bounded():
+    from rose import texture
+    for saturation in np.linspace(0, 1, 2 * texture.TEXTURE_CACHE_SIZE):
+        texture.color_texture('hls', 16, 16, saturation)
+    assert texture._texture.cache_info().currsize == texture.TEXTURE_CACHE_SIZE
@@ -0,0 +1,96 @@
+import functools
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.color import CLOSE_ULPS, COLOR_MODELS
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# Precomputed color of the torus over (u, v), for coloring long paths without recomputing
+# the color model per sample.
+#
+# Texels sit on a regular grid: `width` columns over u in [0, 2 pi), wrapping around, and
+# `height` + 1 rows over v in [0, 2 pi] with both ends included, so the seam at the
+# singularity (where opacity jumps from 0 back to 1) is never blended across. Angles of any
+# size are accepted; both are taken modulo 2 pi, except that v at a positive multiple of 2 pi
+# ends a cycle on the last row (Black, opacity 0) like v = 2 pi in the exact color models.
+class ColorTexture:
+    def __init__(self, model='hls', width=512, height=512, saturation=1.0, dtype=np.float32):
+        started = log.start()
+        self.model = model
+        self.width = width
+        self.height = height
+        self.saturation = saturation
+        with span('color texture', model=model, width=width, height=height):
+            u = np.arange(width) * (2 * np.pi / width)
+            v = np.linspace(0, 2 * np.pi, height + 1)
+            U, V = np.meshgrid(u, v)
+            rgba = COLOR_MODELS[model](U, V, saturation)
+            self.texels = np.ascontiguousarray(rgba.reshape(-1, rgba.shape[-1]), dtype=dtype)
+        log.summary(logger, 'ColorTexture', started, model=model, width=width, height=height)
+
+    @property
+    def nbytes(self):
+        return self.texels.nbytes
+
+    # Flat index of the lower-left texel of each (u, v) and the weights towards the next
+    # column and row. floor() instead of np.mod keeps this cheap for long paths.
+    def _coordinates(self, u, v):
+        x = u * (self.width / (2 * np.pi))
+        column = np.floor(x)
+        wx = x - column
+        y = v * (self.height / (2 * np.pi))
+        wrapped = y - np.floor(y / self.height) * self.height
+        # Positive multiples of 2 pi close a cycle on the last row, as color.circle_angle does
+        tolerance = CLOSE_ULPS * np.spacing(y)
+        y = np.where((y > 0) & ((wrapped <= tolerance) | (self.height - wrapped <= tolerance)), self.height, wrapped)
+        row = np.minimum(np.floor(y), self.height - 1)
+        wy = y - row
+        column = column.astype(np.intp) % self.width
+        return row.astype(np.intp) * self.width + column, column, wx, wy
+
+    # Color at each (u, v) as shape (..., channels). 'nearest' is a single gather; 'bilinear'
+    # blends the four surrounding texels, wrapping around in u.
+    def sample(self, u, v, filter='bilinear'):
+        u, v = np.broadcast_arrays(np.asarray(u, dtype=float), np.asarray(v, dtype=float))
+        index, column, wx, wy = self._coordinates(u, v)
+        if filter == 'nearest':
+            index += np.where(wy >= 0.5, self.width, 0)
+            index += np.where(wx < 0.5, 0, np.where(column == self.width - 1, 1 - self.width, 1))
+            return np.take(self.texels, index, axis=0)
+        if filter != 'bilinear':
+            raise ValueError(f"Unknown texture filter {filter!r}")
+        step = np.where(column == self.width - 1, 1 - self.width, 1)  # next column, wrapping in u
+        wx = wx.astype(self.texels.dtype)[..., None]
+        wy = wy.astype(self.texels.dtype)[..., None]
+        top = np.take(self.texels, index, axis=0)
+        top *= 1 - wx
+        top += np.take(self.texels, index + step, axis=0) * wx
+        index += self.width
+        bottom = np.take(self.texels, index, axis=0)
+        bottom *= 1 - wx
+        bottom += np.take(self.texels, index + step, axis=0) * wx
+        top *= 1 - wy
+        bottom *= wy
+        top += bottom
+        return top
+
+# Shared textures by (model, width, height, saturation), built on first use. A sweep over
+# saturation would build a new texture per frame, so only the last TEXTURE_CACHE_SIZE are kept
+# (about 4 MB each at the default size).
+TEXTURE_CACHE_SIZE = 16
+
+@functools.lru_cache(maxsize=TEXTURE_CACHE_SIZE)
+def _texture(model, width, height, saturation):
+    return ColorTexture(model, width, height, saturation)
+
+def color_texture(model='hls', width=512, height=512, saturation=1.0):
+    return _texture(model, width, height, float(saturation))
+
+# Colors along a path given by its angles, e.g. from paths.journey_angles
+def path_colors(u, v, model='hls', saturation=1.0, filter='bilinear', width=512, height=512):
+    with span('path colors', samples=np.size(u), model=model):
+        return color_texture(model, width, height, saturation).sample(u, v, filter)
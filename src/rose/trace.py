@@ -0,0 +1,187 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Lightweight tracing for the render pipeline.
+#
+# Code marks its stages with `with span('trig'):`. While tracing is disabled span() returns
+# a shared no-op context manager, so instrumented code pays one global lookup per stage
+# and nothing per element. While enabled, spans are recorded with their duration, thread
+# and arguments and can be written as Chrome trace JSON (chrome://tracing, Perfetto).
+# count() keeps running totals such as bytes of arrays generated, shown as counter tracks.
+# With memory=True tracemalloc runs as well: every span records the bytes it left
+# allocated, and snapshot() captures the top allocation sites.
+#
+# Set ROSE_TRACE=trace.json (and optionally ROSE_TRACE_MEMORY=1) to trace a whole process
+# and write the file at exit, without touching code.
+
+_tracer = None
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start', 'memory_start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    # Attach arguments discovered while the span runs, e.g. output sizes
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        end = time.perf_counter_ns()
+        if self.tracer.memory:
+            self.args['alloc_bytes'] = tracemalloc.get_traced_memory()[0] - self.memory_start
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+class Tracer:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.events = []
+        self.snapshots = []
+        self.totals = {}
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _us(self, ns):
+        return (ns - self.origin) / 1000
+
+    def record(self, name, start, end, args):
+        event = {'name': name, 'ph': 'X', 'ts': self._us(start), 'dur': (end - start) / 1000,
+                 'pid': self.pid, 'tid': threading.get_ident(), 'args': args}
+        with self._lock:
+            self.events.append(event)
+
+    def count(self, name, amount):
+        with self._lock:
+            total = self.totals[name] = self.totals.get(name, 0) + amount
+            self.events.append({'name': name, 'ph': 'C', 'ts': self._us(time.perf_counter_ns()),
+                                'pid': self.pid, 'args': {name: total}})
+
+    # Top allocation sites right now, kept in the trace as an instant event
+    def snapshot(self, label, limit=20):
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc snapshots need tracing enabled with memory=True")
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:limit]
+        top = [{'site': str(stat.traceback[0]), 'bytes': stat.size, 'count': stat.count} for stat in stats]
+        self.snapshots.append({'label': label, 'top': top})
+        with self._lock:
+            self.events.append({'name': f'snapshot: {label}', 'ph': 'i', 's': 'p',
+                                'ts': self._us(time.perf_counter_ns()), 'pid': self.pid,
+                                'tid': threading.get_ident(), 'args': {'top': top[:5]}})
+        return top
+
+    # Total time and call count per span name, in milliseconds
+    def summary(self):
+        totals = {}
+        for event in self.events:
+            if event['ph'] == 'X':
+                count, total = totals.get(event['name'], (0, 0.0))
+                totals[event['name']] = (count + 1, total + event['dur'] / 1000)
+        return totals
+
+    def chrome_trace(self):
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms',
+                'otherData': {'totals': self.totals, 'snapshots': self.snapshots}}
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+def enabled():
+    return _tracer is not None
+
+def current():
+    return _tracer
+
+def enable(memory=False):
+    global _tracer
+    disable()
+    _tracer = Tracer(memory=memory)
+    return _tracer
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+def span(name, /, **args):
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, args)
+
+# Add to a running total, e.g. count('array bytes', X.nbytes)
+def count(name, amount=1):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, amount)
+
+def snapshot(label, limit=20):
+    tracer = _tracer
+    if tracer is not None and tracer.memory:
+        return tracer.snapshot(label, limit)
+    return None
+
+# Trace everything inside the block; the Chrome trace is written to `path` if given
+@contextlib.contextmanager
+def tracing(path=None, memory=False):
+    tracer = enable(memory=memory)
+    try:
+        yield tracer
+    finally:
+        disable()
+        if path is not None:
+            tracer.write(path)
+
+def _trace_from_environment():
+    path = os.environ.get('ROSE_TRACE')
+    if not path:
+        return
+    enable(memory=os.environ.get('ROSE_TRACE_MEMORY', '') not in ('', '0'))
+
+    def write():
+        tracer = disable()
+        if tracer is not None:
+            tracer.write(path)
+    atexit.register(write)
+
+_trace_from_environment()
@@ -0,0 +1,106 @@
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.color import COLOR_MODELS
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# The nested tori as one continuous volume, rendered by ray marching.
+#
+# The horn tori of every radius r share the origin: in the (rho, z) half-plane, with rho the
+# distance from the axis, the layer of radius r is the circle (rho - r)^2 + z^2 = r^2. So each
+# point inside the outer torus lies on exactly one layer, r = (rho^2 + z^2) / (2 rho), at
+#
+#   u = atan2(y, x),  v = atan2(-z, r - rho)   (both in [0, 2 pi))
+#
+# and takes that layer's color with saturation r / radius, as render_horn_torus_plotly gives
+# layer i radius and saturation (i + 1) / layers. Rendering composites this field front to
+# back along camera rays. A ray stepping across dr in r crosses layers * |dr| / radius of the
+# discrete shells, each with opacity alpha(v), so a step has opacity 1 - (1 - alpha)^(that
+# many): the continuous limit of the stacked layers. The cost per pixel is a fixed number of
+# steps whatever the layer count, and rays are marched in tiles of `tile` samples so memory
+# stays bounded at any image size.
+
+BACKGROUND = (0xee / 255, 0xee / 255, 0xee / 255)  # the figure's scene background
+
+# (u, v, r) of points given as (..., 3); r is inf on the axis, where no layer passes
+def horn_torus_coordinates(points):
+    x, y, z = np.moveaxis(np.asarray(points, dtype=float), -1, 0)
+    rho = np.hypot(x, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(rho > 0, (rho * rho + z * z) / (2 * rho), np.inf)
+    u = np.arctan2(y, x) % (2 * np.pi)
+    v = np.arctan2(-z, r - rho) % (2 * np.pi)
+    return u, v, r
+
+# RGBA of the continuous layer family at points (..., 3); transparent outside the torus of `radius`
+def color_field(points, radius=1, color_model='hls'):
+    return _field(*horn_torus_coordinates(points), radius, color_model)
+
+# Only points inside the torus are colored; rays spend many samples outside it
+def _field(u, v, r, radius, color_model):
+    inside = r <= radius
+    rgba = np.zeros(np.shape(r) + (4,))
+    rgba[inside] = COLOR_MODELS[color_model](u[inside], v[inside], r[inside] / radius)
+    return rgba
+
+# Pinhole camera looking from `eye` at the origin, z up; unit ray directions as (height, width, 3)
+def camera_rays(width, height, eye, fov=40.0):
+    eye = np.asarray(eye, dtype=float)
+    forward = -eye / np.linalg.norm(eye)
+    right = np.cross(forward, (0.0, 0.0, 1.0))
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    half = np.tan(np.radians(fov) / 2)
+    sx = (np.arange(width) + 0.5 - width / 2) * (2 * half / height)
+    sy = (height / 2 - np.arange(height) - 0.5) * (2 * half / height)
+    directions = forward + sx[None, :, None] * right + sy[:, None, None] * up
+    return directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+
+# Composite the field along rays from `eye`; returns RGB over the background
+def _march(eye, directions, radius, layers, color_model, steps):
+    # The torus of `radius` fits in the sphere of radius 2 * radius
+    b = directions @ eye
+    c = eye @ eye - (2 * radius) ** 2
+    disc = b * b - c
+    hit = disc > 0
+    near = np.maximum(-b - np.sqrt(np.where(hit, disc, 0)), 0)
+    far = -b + np.sqrt(np.where(hit, disc, 0))
+    rgb = np.broadcast_to(np.asarray(BACKGROUND), directions.shape).copy()
+    if not hit.any():
+        return rgb
+    directions, near, far = directions[hit], near[hit], far[hit]
+
+    t = near[:, None] + (far - near)[:, None] * ((np.arange(steps) + 0.5) / steps)
+    points = eye + t[..., None] * directions[:, None, :]
+    u, v, r = horn_torus_coordinates(points)
+    rgba = _field(u, v, r, radius, color_model)
+    r = np.minimum(r, radius)
+    crossed = np.abs(np.diff(r, axis=1, prepend=r[:, :1])) * (layers / radius)
+    opacity = 1 - (1 - np.clip(rgba[..., 3], 0, 1)) ** crossed
+    # Transmittance in front of each sample
+    transmittance = np.cumprod(1 - opacity, axis=1)
+    ahead = np.concatenate([np.ones((len(t), 1)), transmittance[:, :-1]], axis=1)
+    weight = ahead * opacity
+    color = np.einsum('rs,rsc->rc', weight, rgba[..., :3])
+    rgb[hit] = color + transmittance[:, -1:] * BACKGROUND
+    return rgb
+
+# Render the continuous volume of nested layers as an RGB float image (height, width, 3).
+# `layers` sets how many discrete shells the field stands in for, i.e. its density.
+def render_volume(width=400, height=400, radius=1, layers=20, color_model='hls', steps=192,
+                  eye=(3.5, 3.5, 2.5), fov=40.0, tile=1 << 18):
+    started = log.start()
+    eye = np.asarray(eye, dtype=float) * radius
+    directions = camera_rays(width, height, eye, fov).reshape(-1, 3)
+    image = np.empty((len(directions), 3))
+    rays = max(tile // steps, 1)
+    with span('ray march', width=width, height=height, steps=steps):
+        for start in range(0, len(directions), rays):
+            image[start:start + rays] = _march(eye, directions[start:start + rays], radius, layers,
+                                               color_model, steps)
+    log.summary(logger, 'render_volume', started, logging.INFO, width=width, height=height, steps=steps)
+    return image.reshape(height, width, 3)
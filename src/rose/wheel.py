@@ -0,0 +1,55 @@
+import logging
+
+import numpy as np
+
+from rose import log
+from rose.color import hls_to_rgb
+from rose.trace import span
+
+logger = logging.getLogger(__name__)
+
+# The developmental plane (U, Gaia) as a 2D color wheel: hue from angle, saturation from radius.
+# Vectorized ports of the archived matplotlib generators, which logged every pixel.
+
+def generate_even_density_r(resolution=500):
+    # Generate radius values that are evenly spaced in area
+    return np.sqrt(np.linspace(0, 1, resolution))
+
+def map_square_to_circle(square, Theta, R, resolution):
+    started = log.start()
+    # Create a new image array with transparency for the circular region
+    circle = np.ones((resolution, resolution, 4)) * [1, 1, 1, 0]  # Initialize to fully transparent
+
+    center = resolution // 2
+    scale = resolution / 2
+
+    # Convert polar coordinates to Cartesian coordinates scaled to the image dimensions
+    x = (center + R * np.cos(Theta) * scale).astype(int)
+    y = (center + R * np.sin(Theta) * scale).astype(int)
+    inside = (x >= 0) & (x < resolution) & (y >= 0) & (y < resolution)
+    # Later points win where several land on one pixel, as in the original row-major loop
+    circle[y[inside], x[inside]] = square[inside]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        log.summary(logger, 'map_square_to_circle', started, resolution=resolution,
+                    mapped=int(np.count_nonzero(inside)), points=inside.size)
+    return circle
+
+def generate_color_square(resolution=500, even_density=False):
+    started = log.start()
+    with span('color wheel', resolution=resolution):
+        # Create a grid of points in polar coordinates
+        theta = np.linspace(0, 2 * np.pi, resolution)
+        if even_density:
+            r = generate_even_density_r(resolution)
+        else:
+            r = np.linspace(0, 1, resolution)
+        Theta, R = np.meshgrid(theta, r)
+
+        # Fill the image with colors based on the hue (theta) and saturation (r)
+        square = np.ones((resolution, resolution, 4))  # Full opacity
+        square[..., :3] = hls_to_rgb(Theta / (2 * np.pi), 0.5, R)  # Fixed lightness for vibrant colors
+
+        circle = map_square_to_circle(square, Theta, R, resolution)
+    log.summary(logger, 'generate_color_square', started, resolution=resolution, even_density=even_density)
+    return circle
@@ -0,0 +1,133 @@
+import struct
+import zlib
+
+import numpy as np
+
+from rose.factored import FactoredHornTorus
+
+# Binary wire format for generate_3d_horn_torus output.
+#
+# Geometry on the regular (u, v) grid is fully determined by (resolution, radius), so a
+# torus record carries only those parameters plus whatever per-point data the client
+# cannot derive. Colors and alpha are quantized to uint8 and delta-encoded along u, where
+# they vary smoothly, before deflate. When they match the generator's own coloring for
+# the record's saturation they are left out entirely. All values are little-endian:
+#
+#   scene:  b'RSC1', u32 record count, records...
+#   record: b'RTW1', u8 version, u8 flags, u16 reserved, u32 resolution,
+#           f32 radius, f32 saturation, u32 payload length, payload
+#   payload (deflate if FLAG_DEFLATE): [rgb delta bytes (v, u, 3)] [alpha delta bytes (v, u)]
+#
+# src/js/rose_wire.js is the matching browser-side decoder.
+
+SCENE_MAGIC = b'RSC1'
+RECORD_MAGIC = b'RTW1'
+WIRE_VERSION = 1
+
+FLAG_RGB = 1
+FLAG_ALPHA = 2
+FLAG_DEFLATE = 4
+
+_SCENE = struct.Struct('<4sI')
+_RECORD = struct.Struct('<4sBBHIffI')
+
+# Colors the generator assigns for a given saturation, as floats in [0, 1]
+def derived_rgba(resolution, saturation):
+    return FactoredHornTorus(resolution, saturation=saturation).rgba
+
+def quantize(values):
+    return np.rint(np.clip(values, 0, 1) * 255).astype(np.uint8)
+
+# Differences along u wrap modulo 256, so decoding is a cumulative sum in uint8
+def delta_encode(grid):
+    deltas = grid.copy()
+    deltas[:, 1:] -= grid[:, :-1]
+    return deltas
+
+def delta_decode(deltas):
+    return np.cumsum(deltas, axis=1, dtype=np.uint8)
+
+# Encode one torus layer; colors is the (res, res, 4) RGBA array from generate_3d_horn_torus
+def encode_horn_torus(resolution, radius, saturation, colors=None, deflate=True):
+    flags = 0
+    chunks = []
+    saturation = float(np.float32(saturation))  # compare against what the decoder will derive
+    if colors is not None:
+        colors = quantize(colors)
+        derived = quantize(derived_rgba(resolution, saturation))
+        if not np.array_equal(colors[..., :3], derived[..., :3]):
+            flags |= FLAG_RGB
+            chunks.append(delta_encode(colors[..., :3]).tobytes())
+        if not np.array_equal(colors[..., 3], derived[..., 3]):
+            flags |= FLAG_ALPHA
+            chunks.append(delta_encode(colors[..., 3]).tobytes())
+
+    payload = b''.join(chunks)
+    if deflate and payload:
+        flags |= FLAG_DEFLATE
+        payload = zlib.compress(payload, 9)
+    header = _RECORD.pack(RECORD_MAGIC, WIRE_VERSION, flags, 0, resolution, radius, saturation, len(payload))
+    return header + payload
+
+# Decode one record starting at `offset`; returns (X, Y, Z, rgba, params, next offset).
+# Given `unit`, the (X, Y, Z) of the unit torus at the record's resolution, the record reuses
+# them and params['scale'] is its radius; otherwise X, Y, Z are at the radius and scale is 1.
+def decode_horn_torus(data, offset=0, unit=None):
+    magic, version, flags, _, resolution, radius, saturation, size = _RECORD.unpack_from(data, offset)
+    if magic != RECORD_MAGIC or version != WIRE_VERSION:
+        raise ValueError("Not a version %d horn torus record" % WIRE_VERSION)
+    start = offset + _RECORD.size
+    payload = bytes(data[start:start + size])
+    if flags & FLAG_DEFLATE:
+        payload = zlib.decompress(payload)
+
+    layer = FactoredHornTorus(resolution, 1 if unit else radius, saturation)
+    X, Y, Z = unit or (layer.X, layer.Y, layer.Z)
+    rgba = layer.rgba
+    pos = 0
+    if flags & FLAG_RGB:
+        count = resolution * resolution * 3
+        deltas = np.frombuffer(payload, dtype=np.uint8, count=count, offset=pos)
+        rgba[..., :3] = delta_decode(deltas.reshape(resolution, resolution, 3)) / 255
+        pos += count
+    if flags & FLAG_ALPHA:
+        count = resolution * resolution
+        deltas = np.frombuffer(payload, dtype=np.uint8, count=count, offset=pos)
+        rgba[..., 3] = delta_decode(deltas.reshape(resolution, resolution)) / 255
+
+    params = {'resolution': resolution, 'radius': radius, 'saturation': saturation, 'scale': radius if unit else 1}
+    return X, Y, Z, rgba, params, start + size
+
+# Encode a scene of layers given as {radius, saturation}, optionally with their generated colors
+def encode_layers(resolution, layers, colors=None):
+    records = [_SCENE.pack(SCENE_MAGIC, len(layers))]
+    for i, layer in enumerate(layers):
+        records.append(encode_horn_torus(resolution, layer['radius'], layer['saturation'],
+                                         None if colors is None else colors[i]))
+    return b''.join(records)
+
+# Encode the nested layers of render_horn_torus_plotly
+def encode_scene(resolution=100, layers=20, colors=None):
+    nested = [{'radius': (i + 1) / layers, 'saturation': (i + 1) / layers} for i in range(layers)]
+    return encode_layers(resolution, nested, colors)
+
+# Decode a scene into a list of (X, Y, Z, rgba, params) layers. With instanced=True, layers of
+# the same resolution share one unit torus X, Y, Z, drawn scaled by params['scale'].
+def decode_scene(data, instanced=False):
+    magic, count = _SCENE.unpack_from(data)
+    if magic != SCENE_MAGIC:
+        raise ValueError("Not a horn torus scene")
+    offset = _SCENE.size
+    layers = []
+    units = {}
+    for _ in range(count):
+        unit = None
+        if instanced:
+            resolution = _RECORD.unpack_from(data, offset)[4]
+            if resolution not in units:
+                torus = FactoredHornTorus(resolution)
+                units[resolution] = (torus.X, torus.Y, torus.Z)
+            unit = units[resolution]
+        *layer, offset = decode_horn_torus(data, offset, unit)
+        layers.append(tuple(layer))
+    return layers